@@ -1,6 +1,19 @@
+import os
 import random
 import math
-from typing import Dict, Any, List
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, util as mp_util
+from functools import lru_cache
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from app.algorithms.vrp_instance import check_capacity, get_instance, instance_key, parse_customers
+from app.algorithms.vrp_local_search import improve_routes
 
 # Parámetros del problema (constantes)
 DESTINATIONS = {
@@ -28,6 +41,23 @@ TOURNAMENT_K_DEFAULT    = 2
 ELITE_SIZE_DEFAULT      = 2
 REINIT_INTERVAL_DEFAULT = 50
 REINIT_RATE_DEFAULT     = 0.1
+ENGINE_DEFAULT          = "python"
+ROUTE_CACHE_SIZE_DEFAULT = 4096
+ROUTE_CACHE_SIZE_MAX    = 65536  # la caché siempre está acotada
+TIME_BUDGET_MS_DEFAULT  = None   # sin límite de tiempo
+STALL_GENERATIONS_DEFAULT = None # sin parada por estancamiento
+
+# Paso memético (búsqueda local 2-opt / relocate)
+LOCAL_SEARCH_INTERVAL_DEFAULT = None  # desactivado
+LOCAL_SEARCH_MOVES_DEFAULT    = 200   # movimientos evaluados por individuo
+LOCAL_SEARCH_TARGET_DEFAULT   = "elites"
+LOCAL_SEARCH_RATE_DEFAULT     = 0.1   # fracción de hijos si target = "offspring"
+
+# Formato del historial devuelto con verbosity "all"
+HISTORY_FORMAT_DEFAULT = "records"    # "records" (lista de EpochStats) | "columnar"
+
+# Arranque en caliente desde el pool de élites persistido
+WARM_START_FRACTION_DEFAULT = 0.2     # fracción máxima de la población inicial
 
 
 def init_population(pop_size: int, num_vehicles: int, destinations: Dict[int, Any]) -> List[List[List[int]]]:
@@ -127,7 +157,115 @@ def route_distance(route, destinations):
     return dist + euclidean(prev, (0, 0))
 
 
-def _run_full_genetic(params: Dict[str, Any]) -> Dict[str, Any]:
+def make_route_evaluator(destinations: Dict[int, Any], maxsize: int) -> Callable[[Tuple[int, ...]], Tuple[float, int]]:
+    """
+    Devuelve una función (con caché LRU acotada) que, dada una ruta como tupla,
+    calcula su (distancia, demanda total). Entre generaciones la mayoría de
+    rutas se repiten (élites, rutas copiadas en el cruce), así que casi todas
+    las evaluaciones se resuelven desde la caché (~96 % de aciertos).
+
+    La ganancia total es marginal (~10 % del tiempo de una ejecución): en el
+    motor "python" dominan el cruce y la selección, no el fitness. Para
+    acelerar de verdad hay que usar el motor "numpy".
+    """
+    if maxsize is None or not 0 <= maxsize <= ROUTE_CACHE_SIZE_MAX:
+        raise ValueError(f"'route_cache_size' debe estar entre 0 y {ROUTE_CACHE_SIZE_MAX}.")
+    @lru_cache(maxsize=maxsize)
+    def route_cost(route: Tuple[int, ...]) -> Tuple[float, int]:
+        return route_distance(route, destinations), sum(destinations[n][2] for n in route)
+    return route_cost
+
+
+def cached_fitness(individual: List[List[int]], route_cost: Callable, vehicle_capacity: int) -> float:
+    """Igual que `fitness`, pero sumando costes de ruta cacheados."""
+    total_cost = 0
+    for route in individual:
+        dist, demand = route_cost(tuple(route))
+        if demand > vehicle_capacity:
+            return float('inf')
+        total_cost += dist
+    return total_cost
+
+
+def _deadline(params: Dict[str, Any]) -> Optional[float]:
+    time_budget_ms = params.get("time_budget_ms", TIME_BUDGET_MS_DEFAULT)
+    if time_budget_ms is None:
+        return None
+    return time.time() + time_budget_ms / 1000.0
+
+
+def _stop_reason(gen: int, best_gen: int, stall_generations: Optional[int],
+                 deadline: Optional[float]) -> Optional[str]:
+    """
+    Motivo de parada anticipada tras evaluar la generación `gen`:
+    "stall" si el mejor fitness no mejora desde hace `stall_generations`
+    generaciones, "time_budget" si se agotó el tiempo; None para continuar.
+    """
+    if stall_generations is not None and gen - best_gen >= stall_generations:
+        return "stall"
+    if deadline is not None and time.time() >= deadline:
+        return "time_budget"
+    return None
+
+
+def _local_search_config(params: Dict[str, Any]) -> Dict[str, Any]:
+    target = params.get("local_search_target", LOCAL_SEARCH_TARGET_DEFAULT)
+    if target not in ("elites", "offspring"):
+        raise ValueError("'local_search_target' debe ser 'elites' u 'offspring'.")
+    return {
+        "interval": params.get("local_search_interval", LOCAL_SEARCH_INTERVAL_DEFAULT),
+        "moves":    params.get("local_search_moves", LOCAL_SEARCH_MOVES_DEFAULT),
+        "target":   target,
+        "rate":     params.get("local_search_rate", LOCAL_SEARCH_RATE_DEFAULT),
+    }
+
+
+def _local_search_rows(ls: Dict[str, Any], gen: int, elite_size: int, pop_size: int,
+                       rng: random.Random) -> List[int]:
+    """Índices de la nueva población a los que aplicar búsqueda local en `gen`."""
+    if not ls["interval"] or gen % ls["interval"] != 0:
+        return []
+    if ls["target"] == "elites":
+        return list(range(elite_size))
+    children = range(elite_size, pop_size)
+    k = min(len(children), max(1, int(len(children) * ls["rate"])))
+    return rng.sample(children, k)
+
+
+def _seed_routes(params: Dict[str, Any], instance: Dict[str, Any], num_vehicles: int,
+                 pop_size: int) -> List[List[List[int]]]:
+    """
+    Soluciones semilla para la población inicial (`seed_solutions`, rutas con
+    ids de cliente), traducidas a índices de la matriz. Se descartan las que
+    no cubren exactamente a todos los clientes o usan más de V rutas, y se
+    toman como mucho `warm_start` (fracción) de la población.
+    """
+    seeds = params.get("seed_solutions") or []
+    fraction = params.get("warm_start", WARM_START_FRACTION_DEFAULT)
+    if fraction is True or not isinstance(fraction, (int, float)):
+        fraction = WARM_START_FRACTION_DEFAULT
+    limit = max(1, int(pop_size * fraction)) if seeds else 0
+
+    index = {node: i for i, node in enumerate(instance["ids"], start=1)}
+    expected = list(range(1, len(index) + 1))
+    valid = []
+    for solution in seeds:
+        if len(valid) >= limit:
+            break
+        try:
+            routes = [[index[node] for node in route] for route in solution if route]
+        except (KeyError, TypeError):
+            continue
+        if len(routes) > num_vehicles or sorted(i for r in routes for i in r) != expected:
+            continue
+        routes.extend([] for _ in range(num_vehicles - len(routes)))
+        valid.append(routes)
+    return valid
+
+
+def _run_full_genetic(params: Dict[str, Any], instance: Dict[str, Any],
+                      on_epoch: Optional[Callable[[Dict[str, Any]], None]] = None,
+                      first_epoch: bool = True) -> Dict[str, Any]:
     pop_size        = params.get("population_size", POP_SIZE_DEFAULT)
     generations     = params.get("generations", GENERATIONS_DEFAULT)
     mutation_rate   = params.get("mutation_rate", MUTATION_RATE_DEFAULT)
@@ -137,24 +275,38 @@ def _run_full_genetic(params: Dict[str, Any]) -> Dict[str, Any]:
     reinit_rate     = params.get("reinit_rate", REINIT_RATE_DEFAULT)
     num_vehicles    = params.get("num_vehicles", NUM_VEHICLES_DEFAULT)
     vehicle_capacity= params.get("vehicle_capacity", VEHICLE_CAPACITY_DEFAULT)
+    cache_size      = params.get("route_cache_size", ROUTE_CACHE_SIZE_DEFAULT)
+    stall_gens      = params.get("stall_generations", STALL_GENERATIONS_DEFAULT)
+    deadline        = _deadline(params)
+    ls              = _local_search_config(params)
+    first_limit     = params.get("first_epoch_limit")
 
-    population = init_population(pop_size, num_vehicles, DESTINATIONS)
+    destinations = instance["destinations"]
+    ids = instance["ids"]
+    index = {node: i for i, node in enumerate(ids, start=1)}
+    route_cost = make_route_evaluator(destinations, cache_size)
+    population = init_population(pop_size, num_vehicles, destinations)
+    for i, routes in enumerate(_seed_routes(params, instance, num_vehicles, pop_size)):
+        population[i] = [[ids[j - 1] for j in route] for route in routes]
     history = []
     best_solution = None
     best_fit = float('inf')
+    best_gen = 1
     first_epoch_info = None
+    stop = {"reason": "generations", "gen": generations}
 
     for gen in range(1, generations + 1):
-        fits = [fitness(ind, DESTINATIONS, vehicle_capacity) for ind in population]
+        fits = [cached_fitness(ind, route_cost, vehicle_capacity) for ind in population]
 
         # Guardar la primera generación
-        if gen == 1:
+        if gen == 1 and first_epoch:
             best1 = min(fits)
             avg1  = sum(fits) / len(fits)
             first_epoch_info = {
                 "best": best1 if math.isfinite(best1) else None,
                 "avg":  avg1  if math.isfinite(avg1) else None,
-                "population": population.copy()
+                "population": population[:first_limit],
+                "population_size": len(population)
             }
 
         elites = [ind for _, ind in sorted(zip(fits, population))][:elite_size]
@@ -162,58 +314,885 @@ def _run_full_genetic(params: Dict[str, Any]) -> Dict[str, Any]:
             if f < best_fit:
                 best_fit = f
                 best_solution = ind
+                best_gen = gen
 
         min_fit = min(fits)
         avg_fit = sum(fits) / len(fits)
-        history.append({
+        entry = {
             "gen": gen,
             "best": min_fit if math.isfinite(min_fit) else None,
             "avg":  avg_fit if math.isfinite(avg_fit) else None
-        })
+        }
+        if on_epoch is not None:
+            on_epoch(entry)
+        else:
+            history.append(entry)
+
+        reason = _stop_reason(gen, best_gen, stall_gens, deadline)
+        if reason and gen < generations:
+            stop = {"reason": reason, "gen": gen}
+            break
 
         new_pop = elites.copy()
         while len(new_pop) < pop_size:
             p1 = tournament_selection(population, fits, tournament_k)
             p2 = tournament_selection(population, fits, tournament_k)
-            child = crossover(p1, p2, DESTINATIONS, vehicle_capacity)
+            child = crossover(p1, p2, destinations, vehicle_capacity)
             child = mutate(child, mutation_rate)
             new_pop.append(child)
 
         if gen % reinit_interval == 0:
             n_reinit = int(pop_size * reinit_rate)
-            new_pop[-n_reinit:] = init_population(n_reinit, num_vehicles, DESTINATIONS)
+            new_pop[-n_reinit:] = init_population(n_reinit, num_vehicles, destinations)
+
+        for row in _local_search_rows(ls, gen, min(elite_size, pop_size), len(new_pop), random):
+            routes = [[index[node] for node in route] for route in new_pop[row]]
+            routes = improve_routes(routes, instance["dist"], instance["demand"], vehicle_capacity,
+                                    instance["neighbors"], ls["moves"])
+            new_pop[row] = [[ids[i - 1] for i in route] for route in routes]
 
         population = new_pop
 
+    if best_solution is None:
+        # Ningún individuo respetó la capacidad (p. ej. demandas que no caben
+        # en num_vehicles rutas aunque la demanda total sí quepa)
+        raise ValueError(
+            "No se encontró ninguna solución factible con la flota indicada; "
+            "prueba con más vehículos, más capacidad o el motor 'numpy'."
+        )
+
     total_distance = sum(
-        route_distance(route, DESTINATIONS)
+        route_distance(route, destinations)
         for route in best_solution
     )
 
+    info = route_cost.cache_info()
     return {
         "history": history,
         "first_epoch": first_epoch_info,
         "final": {
             "best_solution": best_solution,
-            "total_distance": total_distance
+            "total_distance": total_distance,
+            "stop": stop
+        },
+        "cache_stats": {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+        }
+    }
+
+
+# ---------------------------------------------------------------------------
+# Motor vectorizado (NumPy)
+#
+# Cada individuo es una permutación de "tokens" 1..n+V-1: los tokens 1..n son
+# los clientes y los tokens n+1..n+V-1 son separadores de ruta (vuelta al
+# depósito). Así toda la población cabe en una matriz (pop, n+V-1) de enteros
+# y la evaluación, la selección y el cruce se hacen en bloque.
+# ---------------------------------------------------------------------------
+
+def _np_init_population(rng: np.random.Generator, pop_size: int, n: int, num_vehicles: int) -> np.ndarray:
+    # Mismo reparto que init_population: clientes barajados en V trozos iguales
+    perms = rng.random((pop_size, n)).argsort(axis=1) + 1
+    avg = n / float(num_vehicles)
+    cuts = [int(i * avg) for i in range(1, num_vehicles)]
+    separators = np.arange(n + 1, n + num_vehicles)
+    return np.insert(perms, cuts, separators, axis=1)
+
+
+def _np_fitness(population: np.ndarray, n: int, num_vehicles: int, dist: np.ndarray,
+                demand: np.ndarray, vehicle_capacity: int) -> np.ndarray:
+    pop_size = population.shape[0]
+    nodes = np.where(population > n, 0, population)
+    padded = np.pad(nodes, ((0, 0), (1, 1)))  # depósito al inicio y al final
+    costs = dist[padded[:, :-1], padded[:, 1:]].sum(axis=1)
+
+    # Carga por ruta: el índice de ruta avanza en cada separador
+    route_idx = np.cumsum(population > n, axis=1) + np.arange(pop_size)[:, None] * num_vehicles
+    loads = np.bincount(route_idx.ravel(), weights=demand[nodes].ravel(),
+                        minlength=pop_size * num_vehicles).reshape(pop_size, num_vehicles)
+    costs[(loads > vehicle_capacity).any(axis=1)] = np.inf
+    return costs
+
+
+def _np_tournament(rng: np.random.Generator, fits: np.ndarray, n_winners: int, k: int) -> np.ndarray:
+    if k > fits.shape[0]:
+        raise ValueError("El tamaño del torneo 'k' no puede ser mayor que la población.")
+    # Todos los torneos a la vez (participantes con reemplazo)
+    contenders = rng.integers(0, fits.shape[0], size=(n_winners, k))
+    winners = fits[contenders].argmin(axis=1)
+    return contenders[np.arange(n_winners), winners]
+
+
+def _np_order_crossover(rng: np.random.Generator, parents1: np.ndarray, parents2: np.ndarray) -> np.ndarray:
+    """
+    Cruce OX en bloque: cada hijo conserva un segmento de parents1 y rellena
+    el resto de posiciones con los tokens restantes en el orden de parents2.
+    El resultado siempre es una permutación válida, sin necesidad de reparar.
+    """
+    n_children, length = parents1.shape
+    rows = np.arange(n_children)[:, None]
+    bounds = np.sort(rng.integers(0, length + 1, size=(n_children, 2)), axis=1)
+    positions = np.arange(length)[None, :]
+    in_segment = (positions >= bounds[:, :1]) & (positions < bounds[:, 1:])
+
+    # Tokens del segmento (indexado por token)
+    token_in_segment = np.zeros((n_children, length + 1), dtype=bool)
+    token_in_segment[np.broadcast_to(rows, parents1.shape), parents1] = in_segment
+
+    # Orden estable: primero lo que se conserva / rellena, después el resto
+    keep = ~token_in_segment[rows, parents2]
+    fill_tokens = np.take_along_axis(parents2, np.argsort(~keep, axis=1, kind="stable"), axis=1)
+    free_slots = np.argsort(in_segment, axis=1, kind="stable")
+
+    n_free = length - (bounds[:, 1:] - bounds[:, :1])
+    values = np.where(positions < n_free, fill_tokens, np.take_along_axis(parents1, free_slots, axis=1))
+    children = np.empty_like(parents1)
+    np.put_along_axis(children, free_slots, values, axis=1)
+    return children
+
+
+def _np_mutate(rng: np.random.Generator, population: np.ndarray, mutation_rate: float, rounds: int) -> np.ndarray:
+    n_ind, length = population.shape
+    rows = np.arange(n_ind)
+    for _ in range(rounds):
+        mask = rng.random(n_ind) < mutation_rate
+        if not mask.any():
+            continue
+        r = rows[mask]
+        i1 = rng.integers(0, length, size=r.size)
+        i2 = rng.integers(0, length, size=r.size)
+        population[r, i1], population[r, i2] = population[r, i2], population[r, i1]
+    return population
+
+
+def _np_decode_tokens(individual: np.ndarray, n: int) -> List[List[int]]:
+    routes: List[List[int]] = [[]]
+    for token in individual.tolist():
+        if token > n:
+            routes.append([])
+        else:
+            routes[-1].append(token)
+    return routes
+
+
+# ---------------------------------------------------------------------------
+# Codificación "giant tour"
+#
+# Cada individuo es una única permutación de los clientes 1..n (sin
+# separadores). Las rutas se obtienen con el procedimiento Split: el reparto
+# óptimo de la secuencia en, como mucho, V rutas que respetan la capacidad.
+# El cruce OX sobre la permutación nunca necesita reparación.
+# ---------------------------------------------------------------------------
+
+def _split_layer(prev: List[float], entry: List[float], exit_: List[float], cum_load: List[float],
+                 vehicle_capacity: float, unbounded: bool = False) -> Tuple[List[float], List[int]]:
+    """
+    Una pasada lineal de Split con deque monótona: cur[t] es el mejor coste de
+    servir los t primeros clientes abriendo una ruta más tras algún i con
+    prev[i] finito. Con `unbounded` la capa se alimenta de sí misma (flota
+    ilimitada).
+    """
+    n = len(entry)
+    inf = float('inf')
+    cur = prev if unbounded else [inf] * (n + 1)
+    pred = [-1] * (n + 1)
+    dq = deque()
+    keys = deque()
+    for t in range(1, n + 1):
+        i = t - 1
+        if prev[i] < inf:
+            key = prev[i] + entry[i]
+            while keys and keys[-1] >= key:
+                keys.pop()
+                dq.pop()
+            dq.append(i)
+            keys.append(key)
+        while dq and cum_load[t] - cum_load[dq[0]] > vehicle_capacity:
+            dq.popleft()
+            keys.popleft()
+        if dq:
+            cur[t] = keys[0] + exit_[t]
+            pred[t] = dq[0]
+    return cur, pred
+
+
+def _split(tour: List[int], cum_dist: List[float], cum_load: List[float], depot_dist: List[float],
+           vehicle_capacity: float, num_vehicles: int, with_routes: bool = False, layered: bool = True):
+    """
+    Split (Vidal, 2016): reparto óptimo del giant tour en rutas factibles.
+
+    Primero se resuelve con flota ilimitada en una sola pasada lineal; si la
+    solución usa más de V rutas se repite por capas (una por vehículo),
+    O(V·n) en total. Con `layered=False` no se hace la pasada por capas y se
+    devuelve coste nan, para resolverla en bloque con `_split_bounded_np`.
+
+    :param tour: clientes en orden (índices 1..n de la matriz de distancias)
+    :param cum_dist: cum_dist[j] = distancia recorrida del cliente 1 al j (j=1..n)
+    :param cum_load: cum_load[j] = demanda acumulada hasta el cliente j (cum_load[0] = 0)
+    :param depot_dist: distancia depósito-nodo, indexada por nodo
+    :return: (coste, rutas) — coste inf si no hay reparto factible
+    """
+    n = len(tour)
+    inf = float('inf')
+    if n == 0:
+        return 0.0, ([[] for _ in range(num_vehicles)] if with_routes else None)
+
+    # key(i) = p(i) + d(0, c_{i+1}) - D(i+1): coste de abrir ruta tras la posición i
+    entry = [depot_dist[tour[i]] - cum_dist[i + 1] for i in range(n)]
+    exit_ = [0.0] + [cum_dist[t] + depot_dist[tour[t - 1]] for t in range(1, n + 1)]
+
+    # Flota ilimitada
+    cur, pred = _split_layer([0.0] + [inf] * n, entry, exit_, cum_load, vehicle_capacity, unbounded=True)
+    cuts = []
+    t = n
+    while t > 0 and pred[t] >= 0:
+        cuts.append(t)
+        t = pred[t]
+    if t == 0 and len(cuts) <= num_vehicles:
+        if not with_routes:
+            return cur[n], None
+        bounds = [0] + cuts[::-1]
+        routes = [tour[a:b] for a, b in zip(bounds, bounds[1:])]
+        routes.extend([] for _ in range(num_vehicles - len(routes)))
+        return cur[n], routes
+    if math.isinf(cur[n]):
+        return inf, None
+    if not layered:
+        return math.nan, None
+
+    # Flota limitada: una capa por vehículo
+    prev = [0.0] + [inf] * n
+    layers = []
+    best, best_k = inf, 0
+    for k in range(1, num_vehicles + 1):
+        prev, pred = _split_layer(prev, entry, exit_, cum_load, vehicle_capacity)
+        layers.append(pred)
+        if prev[n] < best:
+            best, best_k = prev[n], k
+
+    if not with_routes or best_k == 0:
+        return best, None
+
+    routes = []
+    t = n
+    for k in range(best_k - 1, -1, -1):
+        i = layers[k][t]
+        routes.append(tour[i:t])
+        t = i
+    routes.reverse()
+    routes.extend([] for _ in range(num_vehicles - best_k))
+    return best, routes
+
+
+def _gt_prefix_sums(population: np.ndarray, dist: np.ndarray, demand: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Distancias y cargas acumuladas de toda la población en bloque
+    legs = dist[population[:, :-1], population[:, 1:]]
+    cum_dist = np.zeros((population.shape[0], population.shape[1] + 1))
+    cum_dist[:, 2:] = np.cumsum(legs, axis=1)
+    cum_load = np.zeros_like(cum_dist)
+    cum_load[:, 1:] = np.cumsum(demand[population], axis=1)
+    return cum_dist, cum_load
+
+
+def _split_bounded_np(population: np.ndarray, cum_dist: np.ndarray, cum_load: np.ndarray,
+                      depot_dist: np.ndarray, vehicle_capacity: float, num_vehicles: int) -> np.ndarray:
+    """
+    Pasada por capas de Split (flota limitada) para varios giant tours a la
+    vez; sólo el coste. En cada capa, cur[t] = exit[t] + min(prev[i] + entry[i])
+    sobre la ventana de i con carga(i..t] ≤ Q, que se recorre por desplazamientos
+    j = t - i: O(V·W) operaciones vectoriales, con W el máximo de clientes por
+    ruta.
+    """
+    P, n = population.shape
+    inf = np.inf
+    entry = depot_dist[population] - cum_dist[:, 1:]
+    exit_ = np.full((P, n + 1), inf)
+    exit_[:, 1:] = cum_dist[:, 1:] + depot_dist[population]
+
+    # valid[j - 1][:, t - j] = la ruta (t - j, t] cabe en un vehículo
+    valid = []
+    for j in range(1, n + 1):
+        fits = (cum_load[:, j:] - cum_load[:, :n + 1 - j]) <= vehicle_capacity
+        if not fits.any():
+            break
+        valid.append(fits)
+
+    prev = np.full((P, n + 1), inf)
+    prev[:, 0] = 0.0
+    best = np.full(P, inf)
+    for _ in range(num_vehicles):
+        keys = prev[:, :n] + entry
+        window_min = np.full((P, n + 1), inf)
+        for j, fits in enumerate(valid, start=1):
+            np.minimum(window_min[:, j:], np.where(fits, keys[:, :n + 1 - j], inf), out=window_min[:, j:])
+        prev = window_min + exit_
+        np.minimum(best, prev[:, n], out=best)
+    return best
+
+
+def _gt_fitness(population: np.ndarray, num_vehicles: int, dist: np.ndarray,
+                demand: np.ndarray, vehicle_capacity: int) -> np.ndarray:
+    cum_dist, cum_load = _gt_prefix_sums(population, dist, demand)
+    depot_dist = dist[0].tolist()
+    costs = np.array([
+        _split(tour, cd, cl, depot_dist, vehicle_capacity, num_vehicles, layered=False)[0]
+        for tour, cd, cl in zip(population.tolist(), cum_dist.tolist(), cum_load.tolist())
+    ])
+    # Los que con flota ilimitada usan más de V rutas: pasada por capas en bloque
+    bounded = np.isnan(costs)
+    if bounded.any():
+        costs[bounded] = _split_bounded_np(population[bounded], cum_dist[bounded], cum_load[bounded],
+                                           dist[0], vehicle_capacity, num_vehicles)
+    return costs
+
+
+def _gt_decode(individual: np.ndarray, num_vehicles: int, dist: np.ndarray, demand: np.ndarray,
+               vehicle_capacity: int) -> List[List[int]]:
+    cum_dist, cum_load = _gt_prefix_sums(individual[None, :], dist, demand)
+    tour = individual.tolist()
+    _, routes = _split(tour, cum_dist[0].tolist(), cum_load[0].tolist(), dist[0].tolist(),
+                       vehicle_capacity, num_vehicles, with_routes=True)
+    if routes is None:
+        # Sin reparto factible: trozos iguales, como init_population
+        avg = len(tour) / float(num_vehicles)
+        routes = [tour[int(i * avg): int((i + 1) * avg)] for i in range(num_vehicles)]
+    return routes
+
+
+# Operaciones que dependen de la codificación del motor vectorizado
+
+def _np_init(rng: np.random.Generator, pop_size: int, n: int, cfg: Dict[str, Any]) -> np.ndarray:
+    if cfg["encoding"] == "giant_tour":
+        return (rng.random((pop_size, n)).argsort(axis=1) + 1).astype(np.int32)
+    return _np_init_population(rng, pop_size, n, cfg["num_vehicles"])
+
+
+def _np_evaluate(population: np.ndarray, cfg: Dict[str, Any], dist: np.ndarray, demand: np.ndarray) -> np.ndarray:
+    if cfg["encoding"] == "giant_tour":
+        return _gt_fitness(population, cfg["num_vehicles"], dist, demand, cfg["vehicle_capacity"])
+    return _np_fitness(population, dist.shape[0] - 1, cfg["num_vehicles"], dist, demand, cfg["vehicle_capacity"])
+
+
+def _np_routes(individual: np.ndarray, cfg: Dict[str, Any], dist: np.ndarray, demand: np.ndarray) -> List[List[int]]:
+    # Rutas con índices de la matriz de distancias (1..n)
+    if cfg["encoding"] == "giant_tour":
+        return _gt_decode(individual, cfg["num_vehicles"], dist, demand, cfg["vehicle_capacity"])
+    return _np_decode_tokens(individual, dist.shape[0] - 1)
+
+
+def _np_encode(routes: List[List[int]], cfg: Dict[str, Any], n: int) -> List[int]:
+    if cfg["encoding"] == "giant_tour":
+        return [node for route in routes for node in route]
+    tokens = list(routes[0])
+    for sep, route in enumerate(routes[1:], start=n + 1):
+        tokens.append(sep)
+        tokens.extend(route)
+    return tokens
+
+
+def _np_decode(individual: np.ndarray, cfg: Dict[str, Any], dist: np.ndarray, demand: np.ndarray,
+               ids: List[int]) -> List[List[int]]:
+    return [[ids[node - 1] for node in route] for route in _np_routes(individual, cfg, dist, demand)]
+
+
+def _np_config(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "pop_size":         params.get("population_size", POP_SIZE_DEFAULT),
+        "generations":      params.get("generations", GENERATIONS_DEFAULT),
+        "mutation_rate":    params.get("mutation_rate", MUTATION_RATE_DEFAULT),
+        "tournament_k":     params.get("tournament_k", TOURNAMENT_K_DEFAULT),
+        "elite_size":       params.get("elite_size", ELITE_SIZE_DEFAULT),
+        "reinit_interval":  params.get("reinit_interval", REINIT_INTERVAL_DEFAULT),
+        "reinit_rate":      params.get("reinit_rate", REINIT_RATE_DEFAULT),
+        "num_vehicles":     params.get("num_vehicles", NUM_VEHICLES_DEFAULT),
+        "vehicle_capacity": params.get("vehicle_capacity", VEHICLE_CAPACITY_DEFAULT),
+        "encoding":         "giant_tour" if params.get("engine") == "giant_tour" else "tokens",
+        "stall_generations": params.get("stall_generations", STALL_GENERATIONS_DEFAULT),
+        "local_search":     _local_search_config(params),
+    }
+
+
+def _np_new_state(rng: np.random.Generator, pop_size: int, n: int, cfg: Dict[str, Any],
+                  seeds: Optional[List[List[List[int]]]] = None) -> Dict[str, Any]:
+    population = _np_init(rng, pop_size, n, cfg)
+    for i, routes in enumerate((seeds or [])[:pop_size]):
+        population[i] = _np_encode(routes, cfg, n)
+    return {
+        "rng": rng,
+        "population": population,
+        "best_fit": float('inf'),
+        "best": None,
+        "best_gen": 1,
+        "stats": [],     # (gen, best, avg, tamaño) por generación evaluada
+        "first": None,   # población evaluada en la generación 1
+        "stop": None,    # {"reason", "gen"} si se detuvo antes de tiempo
+    }
+
+
+def _np_evolve(state: Dict[str, Any], cfg: Dict[str, Any], instance: Dict[str, Any],
+               gen_start: int, gen_end: int, deadline: Optional[float] = None,
+               on_epoch: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Avanza la población de `state` desde `gen_start` hasta `gen_end` (incluidas),
+    o hasta que se cumpla una condición de parada (ver `_stop_reason`).
+    Al terminar, las primeras `elite_size` filas de la población son las élites
+    de la última generación evaluada.
+
+    Con `on_epoch` cada generación se entrega al callback y en `state["stats"]`
+    sólo se conserva la primera.
+    """
+    rng = state["rng"]
+    ls_rng = random.Random(int(rng.integers(2 ** 32)))
+    dist, demand = instance["dist"], instance["demand"]
+    population = state["population"]
+    pop_size = population.shape[0]
+    n = dist.shape[0] - 1
+    num_vehicles = cfg["num_vehicles"]
+    elite_size = min(cfg["elite_size"], pop_size)
+    n_children = pop_size - elite_size
+
+    for gen in range(gen_start, gen_end + 1):
+        fits = _np_evaluate(population, cfg, dist, demand)
+
+        min_fit = float(fits.min())
+        avg_fit = float(fits.mean())
+        if on_epoch is not None:
+            on_epoch(_np_history_entry(gen, min_fit, avg_fit))
+        if on_epoch is None or gen == 1:
+            state["stats"].append((gen, min_fit, avg_fit, pop_size))
+
+        # Guardar la primera generación (sólo si se va a devolver)
+        if gen == 1 and cfg["keep_first"]:
+            state["first"] = population.copy()
+
+        order = np.argsort(fits, kind="stable")
+        if state["best"] is None or min_fit < state["best_fit"]:
+            state["best_fit"] = min_fit
+            state["best"] = population[order[0]].copy()
+            state["best_gen"] = gen
+
+        reason = _stop_reason(gen, state["best_gen"], cfg["stall_generations"], deadline)
+        if reason and gen < cfg["generations"]:
+            state["stop"] = {"reason": reason, "gen": gen}
+            break
+
+        parents = population[_np_tournament(rng, fits, 2 * n_children, cfg["tournament_k"])]
+        p1, p2 = parents[:n_children], parents[n_children:]
+        children = _np_mutate(rng, _np_order_crossover(rng, p1, p2), cfg["mutation_rate"], num_vehicles)
+        new_pop = np.concatenate([population[order[:elite_size]], children])
+
+        if gen % cfg["reinit_interval"] == 0:
+            n_reinit = int(pop_size * cfg["reinit_rate"])
+            if n_reinit:
+                new_pop[-n_reinit:] = _np_init(rng, n_reinit, n, cfg)
+
+        for row in _local_search_rows(cfg["local_search"], gen, elite_size, pop_size, ls_rng):
+            routes = improve_routes(_np_routes(new_pop[row], cfg, dist, demand), dist, demand,
+                                    cfg["vehicle_capacity"], instance["neighbors"],
+                                    cfg["local_search"]["moves"], ls_rng)
+            new_pop[row] = _np_encode(routes, cfg, n)
+
+        population = new_pop
+
+    state["population"] = population
+    return state
+
+
+def _np_history_entry(gen: int, best: float, avg: float) -> Dict[str, Any]:
+    return {
+        "gen": gen,
+        "best": best if math.isfinite(best) else None,
+        "avg":  avg if math.isfinite(avg) else None
+    }
+
+
+def _np_result(history: List[Dict[str, Any]], first_epoch_info: Dict[str, Any],
+               best_routes: List[List[int]], destinations: Dict[int, Any],
+               stop: Dict[str, Any]) -> Dict[str, Any]:
+    total_distance = sum(
+        route_distance(route, destinations)
+        for route in best_routes
+    )
+
+    return {
+        "history": history,
+        "first_epoch": first_epoch_info,
+        "final": {
+            "best_solution": best_routes,
+            "total_distance": total_distance,
+            "stop": stop
         }
     }
 
 
-def run_genetic(params: Dict[str, Any], verbosity: str) -> Dict[str, Any]:
+def _run_full_genetic_numpy(params: Dict[str, Any], instance: Dict[str, Any],
+                            on_epoch: Optional[Callable[[Dict[str, Any]], None]] = None,
+                            first_epoch: bool = True) -> Dict[str, Any]:
+    cfg = {**_np_config(params), "keep_first": first_epoch}
+    ids, dist, demand = instance["ids"], instance["dist"], instance["demand"]
+    n = len(ids)
+
+    rng = np.random.default_rng(params.get("seed"))
+    seeds = _seed_routes(params, instance, cfg["num_vehicles"], cfg["pop_size"])
+    state = _np_new_state(rng, cfg["pop_size"], n, cfg, seeds)
+    state = _np_evolve(state, cfg, instance, 1, cfg["generations"], _deadline(params), on_epoch)
+
+    history = [] if on_epoch else [_np_history_entry(gen, best, avg) for gen, best, avg, _ in state["stats"]]
+    first_epoch_info = None
+    if state["first"] is not None:
+        _, best1, avg1, _ = state["stats"][0]
+        first_epoch_info = {
+            "best": best1 if math.isfinite(best1) else None,
+            "avg":  avg1 if math.isfinite(avg1) else None,
+            "population": [
+                _np_decode(ind, cfg, dist, demand, ids)
+                for ind in state["first"][:params.get("first_epoch_limit")]
+            ],
+            "population_size": len(state["first"])
+        }
+    stop = state["stop"] or {"reason": "generations", "gen": cfg["generations"]}
+    return _np_result(history, first_epoch_info, _np_decode(state["best"], cfg, dist, demand, ids),
+                      instance["destinations"], stop)
+
+
+# ---------------------------------------------------------------------------
+# Modelo de islas
+#
+# La población se reparte en N subpoblaciones que evolucionan con el motor
+# "numpy" en el pool de islas del proceso (ver ISLAND_WORKERS), en paralelo
+# si tiene más de un proceso. Cada `migration_interval`
+# generaciones las islas se sincronizan y cada una envía sus élites a la
+# siguiente (topología en anillo), sustituyendo a sus últimos individuos.
+# El estancamiento se evalúa sobre el mejor global en cada sincronización.
+# ---------------------------------------------------------------------------
+
+ISLANDS_DEFAULT            = 1
+MIGRATION_INTERVAL_DEFAULT = 50
+# Procesos del pool de islas de cada proceso que ejecuta el GA. Por defecto se
+# reparten las CPU entre los procesos del planificador (EXEC_WORKERS_GENETIC,
+# uno por CPU), así que con la configuración por defecto vale 1 y las islas se
+# evolucionan en serie en el propio proceso, sin crear procesos fuera de los
+# límites del planificador.
+_CPUS = os.cpu_count() or 1
+ISLAND_WORKERS = int(os.getenv(
+    "GA_ISLAND_WORKERS",
+    str(max(1, _CPUS // int(os.getenv("EXEC_WORKERS_GENETIC", str(_CPUS)))))
+))
+
+_island_lock = threading.Lock()
+_island_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _island_epoch(state: Dict[str, Any], cfg: Dict[str, Any], key: str, destinations: Dict[int, Any],
+                  gen_start: int, gen_end: int, deadline: Optional[float]) -> Dict[str, Any]:
+    # Se ejecuta en un proceso del pool: la matriz de distancias no viaja,
+    # cada proceso la toma de su propia caché de instancias
+    instance = get_instance(destinations, key)
+    return _np_evolve(state, cfg, instance, gen_start, gen_end, deadline)
+
+
+def _island_warmup(destinations: Dict[int, Any], key: str) -> None:
+    # Arranca el proceso y deja la matriz de distancias en su caché
+    get_instance(destinations, key)
+
+
+def _island_pool(instance: Dict[str, Any]) -> Optional[ProcessPoolExecutor]:
+    """
+    Pool de islas del proceso, compartido entre ejecuciones y con a lo sumo
+    ISLAND_WORKERS procesos (None: islas en serie en este proceso). Vuelve
+    con los procesos ya arrancados y con la instancia cargada, para que el
+    arranque no consuma el `time_budget_ms` de la ejecución.
+    """
+    global _island_executor
+    if ISLAND_WORKERS <= 1:
+        return None
+    with _island_lock:
+        if _island_executor is None:
+            _island_executor = ProcessPoolExecutor(max_workers=ISLAND_WORKERS, mp_context=get_context("forkserver"))
+            # Si este proceso es a su vez un worker del planificador, al salir
+            # espera a sus hijos: el pool se cierra antes para no bloquearlo,
+            # y antes que las colas de multiprocessing (prioridad 10), que
+            # tienen que seguir vivas para avisar a sus procesos
+            mp_util.Finalize(_island_executor, _island_executor.shutdown,
+                             kwargs={"cancel_futures": True}, exitpriority=100)
+        pool = _island_executor
+    for f in [pool.submit(_island_warmup, instance["destinations"], instance["key"]) for _ in range(ISLAND_WORKERS)]:
+        f.result()
+    return pool
+
+
+def _reset_island_pool(pool: ProcessPoolExecutor) -> None:
+    # Un proceso del pool murió (BrokenProcessPool): la próxima ejecución crea otro
+    global _island_executor
+    with _island_lock:
+        if _island_executor is pool:
+            _island_executor = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_islands(params: Dict[str, Any], instance: Dict[str, Any],
+                 on_epoch: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 first_epoch: bool = True) -> Dict[str, Any]:
+    cfg = {**_np_config(params), "keep_first": first_epoch}
+    n_islands = params.get("islands", ISLANDS_DEFAULT)
+    migration_interval = params.get("migration_interval", MIGRATION_INTERVAL_DEFAULT)
+    if n_islands < 1 or migration_interval < 1:
+        raise ValueError("'islands' y 'migration_interval' deben ser enteros positivos.")
+    if cfg["pop_size"] < n_islands:
+        raise ValueError("La población debe tener al menos un individuo por isla.")
+    migration_size = min(params.get("migration_size", cfg["elite_size"]), cfg["elite_size"])
+
+    ids, dist, demand = instance["ids"], instance["dist"], instance["demand"]
+    n = len(ids)
+    generations = cfg["generations"]
+    stall_gens = cfg["stall_generations"]
+    island_cfg = {**cfg, "stall_generations": None}
+
+    # Reparto de la población y RNG independiente por isla
+    sizes = [cfg["pop_size"] // n_islands + (i < cfg["pop_size"] % n_islands) for i in range(n_islands)]
+    rngs = np.random.default_rng(params.get("seed")).spawn(n_islands)
+    seeds = _seed_routes(params, instance, cfg["num_vehicles"], cfg["pop_size"])
+    states = [
+        _np_new_state(rng, size, n, cfg, seeds[i::n_islands])
+        for i, (rng, size) in enumerate(zip(rngs, sizes))
+    ]
+
+    history: List[Dict[str, Any]] = []
+    first_entry = last_entry = None
+    first_populations = [None] * n_islands
+    best_fit, best_gen = float('inf'), 1
+    stop = {"reason": "generations", "gen": generations}
+
+    # El presupuesto de tiempo empieza con el pool ya listo
+    pool = _island_pool(instance)
+    deadline = _deadline(params)
+    futures = []
+    try:
+        for gen_start in range(1, generations + 1, migration_interval):
+            gen_end = min(gen_start + migration_interval - 1, generations)
+            epoch_args = (island_cfg, instance["key"], instance["destinations"], gen_start, gen_end, deadline)
+            if pool is None:
+                states = [_island_epoch(st, *epoch_args) for st in states]
+            else:
+                futures = [pool.submit(_island_epoch, st, *epoch_args) for st in states]
+                states = [f.result() for f in futures]
+
+            # Fusión de las estadísticas por generación (hasta la última
+            # generación que completaron todas las islas)
+            for per_gen in zip(*(st["stats"] for st in states)):
+                gen = per_gen[0][0]
+                best = min(s[1] for s in per_gen)
+                total = sum(s[3] for s in per_gen)
+                avg = sum(s[2] * s[3] for s in per_gen) / total
+                last_entry = _np_history_entry(gen, best, avg)
+                first_entry = first_entry or last_entry
+                if on_epoch is not None:
+                    on_epoch(last_entry)
+                else:
+                    history.append(last_entry)
+                if best < best_fit:
+                    best_fit, best_gen = best, gen
+
+            for i, st in enumerate(states):
+                st["stats"] = []
+                if st["first"] is not None:
+                    first_populations[i] = st["first"]
+                    st["first"] = None
+
+            last_gen = last_entry["gen"]
+            if any(st["stop"] for st in states):
+                stop = {"reason": "time_budget", "gen": last_gen}
+                break
+            reason = _stop_reason(last_gen, best_gen, stall_gens, deadline)
+            if reason and last_gen < generations:
+                stop = {"reason": reason, "gen": last_gen}
+                break
+
+            # Migración en anillo: las élites de la isla i sustituyen a los
+            # últimos individuos de la isla i+1
+            if migration_size and n_islands > 1 and gen_end < generations:
+                migrants = [st["population"][:migration_size].copy() for st in states]
+                for i, st in enumerate(states):
+                    incoming = migrants[i - 1]
+                    k = min(len(incoming), st["population"].shape[0])
+                    if k:
+                        st["population"][-k:] = incoming[:k]
+    except BrokenProcessPool:
+        _reset_island_pool(pool)
+        raise
+    finally:
+        # Si la ejecución se interrumpe, sus épocas pendientes no ocupan el pool
+        for f in futures:
+            f.cancel()
+
+    first_epoch_info = None
+    if first_epoch and first_entry:
+        first_epoch_info = {
+            "best": first_entry["best"],
+            "avg": first_entry["avg"],
+            "population": [
+                _np_decode(ind, cfg, dist, demand, ids)
+                for ind in np.concatenate(first_populations)[:params.get("first_epoch_limit")]
+            ],
+            "population_size": sum(len(pop) for pop in first_populations)
+        }
+
+    best_state = min(states, key=lambda st: st["best_fit"])
+    return _np_result(history, first_epoch_info, _np_decode(best_state["best"], cfg, dist, demand, ids),
+                      instance["destinations"], stop)
+
+
+ENGINES = {
+    "python": _run_full_genetic,
+    "numpy": _run_full_genetic_numpy,
+    "giant_tour": _run_full_genetic_numpy,
+}
+
+
+def _resolve_destinations(params: Dict[str, Any]) -> Dict[int, Any]:
+    """
+    Clientes a servir: los enviados en `params` ("customers" y opcionalmente
+    "depot") o, por defecto, DESTINATIONS.
+    """
+    if "customers" in params:
+        return parse_customers(params["customers"], params.get("depot"))
+    return DESTINATIONS
+
+
+def _resolve_instance(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Instancia a resolver (ver `_resolve_destinations`). La matriz de
+    distancias se toma de la caché de instancias por hash de contenido.
+    Lanza ValueError si la flota no puede servir la demanda.
+    """
+    destinations = _resolve_destinations(params)
+    check_capacity(
+        destinations,
+        float(params.get("vehicle_capacity", VEHICLE_CAPACITY_DEFAULT)),
+        params.get("num_vehicles", NUM_VEHICLES_DEFAULT),
+    )
+    return get_instance(destinations)
+
+
+def warmup() -> None:
+    """Precalcula la instancia por defecto (matriz de distancias y vecinos)."""
+    _resolve_instance({})
+
+
+def elite_pool_key(params: Dict[str, Any]) -> Tuple[str, int, float]:
+    """
+    Clave del pool de élites: (hash de instancia, nº de vehículos, capacidad).
+    Sólo hashea los clientes: no construye la matriz de distancias.
+    """
+    return (
+        instance_key(_resolve_destinations(params)),
+        params.get("num_vehicles", NUM_VEHICLES_DEFAULT),
+        float(params.get("vehicle_capacity", VEHICLE_CAPACITY_DEFAULT)),
+    )
+
+
+def is_feasible(params: Dict[str, Any], routes: List[List[int]]) -> bool:
+    """Comprueba capacidad y número de rutas de una solución (con ids de cliente)."""
+    destinations = _resolve_destinations(params)
+    capacity = params.get("vehicle_capacity", VEHICLE_CAPACITY_DEFAULT)
+    return (
+        len([r for r in routes if r]) <= params.get("num_vehicles", NUM_VEHICLES_DEFAULT)
+        and all(sum(destinations[node][2] for node in route) <= capacity for route in routes)
+    )
+
+
+def _downsample_history(history: List[Dict[str, Any]], params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Reduce el historial según `history_every` (una de cada N generaciones),
+    `history_only_improved` (sólo generaciones en que mejoró el mejor) y
+    `history_max_points` (paso calculado para no superar ese número de
+    puntos). La última generación se conserva siempre.
+    """
+    every = params.get("history_every") or 1
+    max_points = params.get("history_max_points")
+    if params.get("history_only_improved"):
+        best_so_far = float('inf')
+        improved = []
+        for entry in history:
+            if entry["best"] is not None and entry["best"] < best_so_far:
+                best_so_far = entry["best"]
+                improved.append(entry)
+        selected = improved
+    else:
+        selected = history
+    if max_points:
+        # Se reserva un punto para la última generación, que se añade al final
+        every = max(every, math.ceil(len(selected) / max(max_points - 1, 1)))
+        if max_points == 1:
+            selected = []
+    selected = selected[::every]
+    if history and (not selected or selected[-1] is not history[-1]):
+        selected.append(history[-1])
+    return selected
+
+
+def run_genetic(params: Dict[str, Any], verbosity: str,
+                on_epoch: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
     """
     Ejecuta el algoritmo genético con los parámetros dados.
 
     :param params: Diccionario con:
       - population_size, generations, mutation_rate, tournament_k, etc.
+      - customers: [{"id", "x", "y", "demand"}, ...] y depot: [x, y]
+        (opcionales; por defecto se resuelve DESTINATIONS)
+      - engine: "python" (por defecto) | "numpy" (población vectorizada) |
+        "giant_tour" (permutación única decodificada con Split)
+      - seed: semilla opcional de los motores "numpy" / "giant_tour"
+      - islands, migration_interval, migration_size: modo islas (ver ISLAND_WORKERS)
+        (usa el motor "numpy", o "giant_tour" si se pide, en cada isla)
+      - time_budget_ms, stall_generations: parada anticipada por tiempo o por
+        estancamiento del mejor fitness; el motivo queda en final.stop
+      - local_search_interval, local_search_moves, local_search_target
+        ("elites"|"offspring"), local_search_rate: paso memético 2-opt /
+        relocate cada N generaciones (desactivado por defecto)
+      - history_format ("records"|"columnar"), history_every,
+        history_only_improved, history_max_points: historial compacto y
+        submuestreado (la última generación se conserva siempre)
+      - first_epoch_limit: máximo de individuos devueltos en first_epoch
+        (population_size indica el tamaño real)
+      - seed_solutions: soluciones (rutas con ids) para sembrar la población
+        inicial, como mucho `warm_start` (fracción) de ella
+      - route_cache_size: tamaño de la caché LRU de rutas (motor "python",
+        0..ROUTE_CACHE_SIZE_MAX); con verbosity "all" se devuelven sus
+        contadores en final.cache_stats
     :param verbosity: "first"|"all"|"final"
+    :param on_epoch: callback opcional que recibe {gen, best, avg} de cada
+        generación en cuanto se evalúa; en ese caso el historial no se
+        acumula y el resultado lo devuelve vacío
     :return: Resultados con historial, primera generación y solución final.
     """
-    raw = _run_full_genetic(params)
+    engine = params.get("engine", ENGINE_DEFAULT)
+    if engine not in ENGINES:
+        raise ValueError(f"Motor genético desconocido: {engine}")
+    instance = _resolve_instance(params)
+    # La primera generación sólo se conserva (y decodifica) si se va a devolver
+    first_epoch = verbosity in ("first", "all")
+    if params.get("islands", ISLANDS_DEFAULT) > 1:
+        raw = _run_islands(params, instance, on_epoch, first_epoch)
+    else:
+        raw = ENGINES[engine](params, instance, on_epoch, first_epoch)
     result: Dict[str, Any] = {}
     if verbosity in ("all",):
-        result["history"] = raw["history"]
+        history = _downsample_history(raw["history"], params)
+        if params.get("history_format", HISTORY_FORMAT_DEFAULT) == "columnar":
+            result["history_columns"] = {
+                "gen": [h["gen"] for h in history],
+                "best": [h["best"] for h in history],
+                "avg": [h["avg"] for h in history],
+            }
+        else:
+            result["history"] = history
     if verbosity in ("first", "all"):
         result["first_epoch"] = raw["first_epoch"]
     result["final"] = raw["final"]
+    if verbosity == "all" and "cache_stats" in raw:
+        result["final"]["cache_stats"] = raw["cache_stats"]
     return result
@@ -1,17 +1,53 @@
 # app/algorithms/nb.py
 
 import os
+import hashlib
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
-from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, Any, List, Optional, Tuple
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
 from sklearn.naive_bayes import BernoulliNB, MultinomialNB, GaussianNB
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
 
+from app.algorithms import nb_registry
+
 # Ruta al CSV local (versión descomprimida de SMSSpamCollection)
 DATA_PATH = os.getenv("NB_DATA_PATH", "data/SMSSpamCollection.csv")
 
+# Caché en memoria del dataset y de las particiones train/test. Se invalida
+# cuando cambia la firma (mtime, tamaño) del fichero en DATA_PATH.
+SPLIT_CACHE_SIZE = 32
+
+# GaussianNB sin densificar la matriz TF-IDF completa
+GAUSSIAN_MODE_DEFAULT = "sparse"       # "sparse" (estadísticos exactos) | "chunked" (partial_fit)
+GAUSSIAN_CHUNK_SIZE_DEFAULT = 512      # filas densificadas a la vez en modo "chunked"
+
+# Espacio de características por hashing (modelos online y modo streaming).
+# Con suavizado de Laplace, cada columna vacía resta masa de probabilidad:
+# espacios grandes (2**16 o más) hunden el f1 de BernoulliNB en este dataset.
+HASHING_FEATURES_DEFAULT = 2 ** 12
+# GaussianNB en modo streaming usa su propio espacio, más grande: con 2**12 las
+# colisiones mezclan términos de spam y ham en la misma columna TF-IDF (f1 0.43
+# frente a 0.70 en memoria). Sus estadísticos son O(clases × características)
+# (~8 MB con 2**18), y así el f1 queda a la par del modo en memoria.
+GAUSSIAN_HASHING_FEATURES_DEFAULT = 2 ** 18
+STREAM_CHUNK_ROWS_DEFAULT = 5000       # filas del CSV leídas por bloque en modo streaming
+
+# Validación cruzada: procesos del pool (cada uno carga el CSV una sola vez)
+CV_WORKERS = int(os.getenv("NB_CV_WORKERS", str(os.cpu_count() or 1)))
+MODEL_NAMES = ("BernoulliNB", "MultinomialNB", "GaussianNB")
+
+_cache_lock = threading.Lock()
+_dataset_cache: Dict[str, Any] = {"signature": None, "df": None}
+_hash_cache: Dict[str, Any] = {"signature": None, "hash": None}
+_split_cache: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+_features_cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+
 def _load_dataset() -> pd.DataFrame:
     """
     Carga y prepara el dataset de SMS desde el archivo CSV en DATA_PATH.
@@ -30,6 +66,220 @@ def _load_dataset() -> pd.DataFrame:
 
     return df
 
+def _data_signature() -> Tuple[str, int, int]:
+    st = os.stat(DATA_PATH)
+    return (DATA_PATH, st.st_mtime_ns, st.st_size)
+
+def _get_dataset() -> Tuple[Tuple, pd.DataFrame]:
+    """Dataset parseado, leído del CSV sólo cuando el fichero cambia."""
+    signature = _data_signature()
+    with _cache_lock:
+        if _dataset_cache["signature"] == signature:
+            return signature, _dataset_cache["df"]
+    df = _load_dataset()
+    with _cache_lock:
+        _dataset_cache["signature"] = signature
+        _dataset_cache["df"] = df
+        _split_cache.clear()
+        _features_cache.clear()
+    return signature, df
+
+def _data_hash() -> str:
+    """sha256 del contenido del CSV, calculado una vez por firma del fichero."""
+    signature = _data_signature()
+    with _cache_lock:
+        if _hash_cache["signature"] == signature:
+            return _hash_cache["hash"]
+    digest = hashlib.sha256()
+    with open(DATA_PATH, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    with _cache_lock:
+        _hash_cache["signature"] = signature
+        _hash_cache["hash"] = digest.hexdigest()
+    return digest.hexdigest()
+
+def _get_split(test_size: float, random_state: int, lowercase: bool,
+               fold: Optional[Tuple[int, int]] = None) -> Tuple:
+    """
+    (X_train, X_test, y_train, y_test) memoizado por
+    (test_size, random_state, lowercase, fold). No deben modificarse.
+
+    Con `fold=(k, i)` la partición es el pliegue i de un StratifiedKFold de
+    k pliegues (y se ignora test_size).
+    """
+    signature, df = _get_dataset()
+    key = (signature, test_size, random_state, lowercase, fold)
+    with _cache_lock:
+        if key in _split_cache:
+            _split_cache.move_to_end(key)
+            return _split_cache[key]
+
+    messages = df['message'].str.lower() if lowercase else df['message']
+    if fold is not None:
+        n_splits, index = fold
+        skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        train_idx, test_idx = list(skf.split(messages, df['label']))[index]
+        split = (messages.iloc[train_idx], messages.iloc[test_idx],
+                 df['label'].iloc[train_idx], df['label'].iloc[test_idx])
+    else:
+        split = tuple(train_test_split(
+            messages, df['label'],
+            test_size=test_size,
+            random_state=random_state,
+            stratify=df['label']
+        ))
+    with _cache_lock:
+        _split_cache[key] = split
+        while len(_split_cache) > SPLIT_CACHE_SIZE:
+            _split_cache.popitem(last=False)
+    return split
+
+def _binary(X):
+    Xb = X.copy()
+    Xb.data[:] = 1
+    return Xb
+
+def _get_features(test_size: float, random_state: int, lowercase: bool,
+                  fold: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+    """
+    Vectorización única por partición: un solo CountVectorizer tokeniza y
+    construye el vocabulario; las vistas binaria (Bernoulli), de conteos
+    (Multinomial) y TF-IDF (Gaussian) se derivan de la misma matriz dispersa.
+    El resultado se memoiza junto a la partición.
+    """
+    signature, _ = _get_dataset()
+    key = (signature, test_size, random_state, lowercase, fold)
+    with _cache_lock:
+        if key in _features_cache:
+            _features_cache.move_to_end(key)
+            return _features_cache[key]
+
+    X_train, X_test, y_train, y_test = _get_split(test_size, random_state, lowercase, fold)
+    vect = CountVectorizer()
+    Xc_train = vect.fit_transform(X_train)
+    Xc_test  = vect.transform(X_test)
+    tfidf = TfidfTransformer()
+    features = {
+        "split": (X_train, X_test, y_train, y_test),
+        "vectorizer": vect,
+        "counts": (Xc_train, Xc_test),
+        "binary": (_binary(Xc_train), _binary(Xc_test)),
+        "tfidf": (tfidf.fit_transform(Xc_train), tfidf.transform(Xc_test)),
+        "idf": tfidf.idf_,
+    }
+    with _cache_lock:
+        _features_cache[key] = features
+        while len(_features_cache) > SPLIT_CACHE_SIZE:
+            _features_cache.popitem(last=False)
+    return features
+
+def _sparse_nbytes(X) -> int:
+    return int(X.data.nbytes + X.indices.nbytes + X.indptr.nbytes)
+
+def _gaussian_stats(X, y, classes, stats: Dict[str, np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Acumula por clase el número de filas, sum(x) y sum(x²) sobre la matriz
+    dispersa. Se puede llamar por bloques para entrenar en streaming.
+    """
+    y = np.asarray(y)
+    if stats is None:
+        stats = {
+            "n": np.zeros(len(classes)),
+            "sum": np.zeros((len(classes), X.shape[1])),
+            "sum_sq": np.zeros((len(classes), X.shape[1])),
+        }
+    X = X.tocsr()
+    X_sq = X.multiply(X).tocsr()
+    for i, c in enumerate(classes):
+        rows = y == c
+        if rows.any():
+            stats["n"][i] += rows.sum()
+            stats["sum"][i] += np.asarray(X[rows].sum(axis=0)).ravel()
+            stats["sum_sq"][i] += np.asarray(X_sq[rows].sum(axis=0)).ravel()
+    return stats
+
+def _gaussian_from_stats(stats: Dict[str, np.ndarray], classes, var_smoothing: float = 1e-9) -> GaussianNB:
+    """GaussianNB ajustado a partir de los estadísticos (varianza = E[x²] - E[x]²)."""
+    if (stats["n"] == 0).any():
+        raise ValueError("Cada clase necesita al menos un mensaje de entrenamiento.")
+    n = stats["n"][:, None]
+    theta = stats["sum"] / n
+    var = np.maximum(stats["sum_sq"] / n - theta ** 2, 0.0)
+
+    total = stats["n"].sum()
+    mean_all = stats["sum"].sum(axis=0) / total
+    var_all = np.maximum(stats["sum_sq"].sum(axis=0) / total - mean_all ** 2, 0.0)
+
+    model = GaussianNB(var_smoothing=var_smoothing)
+    model.classes_ = np.asarray(classes)
+    model.epsilon_ = var_smoothing * var_all.max()
+    model.theta_ = theta
+    model.var_ = var + model.epsilon_
+    model.class_count_ = stats["n"].copy()
+    model.class_prior_ = stats["n"] / total
+    model.n_features_in_ = theta.shape[1]
+    return model
+
+def _gaussian_fit_sparse(X, y, var_smoothing: float = 1e-9) -> GaussianNB:
+    """
+    Ajusta un GaussianNB calculando medias y varianzas por clase directamente
+    sobre la matriz dispersa, equivalente a `fit` sobre la matriz densa sin
+    materializarla.
+    """
+    classes = np.unique(np.asarray(y))
+    return _gaussian_from_stats(_gaussian_stats(X, y, classes), classes, var_smoothing)
+
+def _gaussian_predict_sparse(model: GaussianNB, X) -> np.ndarray:
+    # sum((x - θ)² / σ²) = X² · (1/σ²) - 2 X · (θ/σ²) + sum(θ²/σ²)
+    inv_var = 1.0 / model.var_
+    X_sq = X.multiply(X)
+    quad = (
+        np.asarray(X_sq @ inv_var.T)
+        - 2 * np.asarray(X @ (model.theta_ * inv_var).T)
+        + (model.theta_ ** 2 * inv_var).sum(axis=1)
+    )
+    jll = (
+        np.log(model.class_prior_)
+        - 0.5 * np.log(2.0 * np.pi * model.var_).sum(axis=1)
+        - 0.5 * quad
+    )
+    return model.classes_[np.argmax(jll, axis=1)]
+
+def _gaussian_fit_chunked(X, y, chunk_size: int) -> GaussianNB:
+    """Ajusta GaussianNB con partial_fit densificando sólo `chunk_size` filas a la vez."""
+    y = np.asarray(y)
+    classes = np.unique(y)
+    model = GaussianNB()
+    for start in range(0, X.shape[0], chunk_size):
+        model.partial_fit(X[start:start + chunk_size].toarray(), y[start:start + chunk_size], classes=classes)
+    return model
+
+def _predict_chunked(model, X, chunk_size: int) -> np.ndarray:
+    return np.concatenate([
+        model.predict(X[start:start + chunk_size].toarray())
+        for start in range(0, X.shape[0], chunk_size)
+    ])
+
+def _fit_predict(name: str, features: Dict[str, Any], gaussian_mode: str, chunk_size: int) -> Tuple:
+    """Entrena el modelo `name` con su vista de características y predice el test."""
+    view = {"BernoulliNB": "binary", "MultinomialNB": "counts", "GaussianNB": "tfidf"}[name]
+    Xtr, Xte = features[view]
+    _, _, ytr, _ = features["split"]
+    if name == "GaussianNB" and gaussian_mode == "sparse":
+        model = _gaussian_fit_sparse(Xtr, ytr)
+        return model, _gaussian_predict_sparse(model, Xte)
+    if name == "GaussianNB":
+        model = _gaussian_fit_chunked(Xtr, ytr, chunk_size)
+        return model, _predict_chunked(model, Xte, chunk_size)
+    model = BernoulliNB() if name == "BernoulliNB" else MultinomialNB()
+    model.fit(Xtr, ytr)
+    return model, model.predict(Xte)
+
+def warmup() -> None:
+    """Carga el dataset y vectoriza la partición por defecto en la caché."""
+    _get_features(0.2, 42, True)
+
 def _compute_metrics(y_true, y_pred) -> Dict[str, float]:
     """Devuelve un diccionario con accuracy, precision, recall y f1."""
     return {
@@ -39,12 +289,256 @@ def _compute_metrics(y_true, y_pred) -> Dict[str, float]:
         "f1": f1_score(y_true, y_pred, zero_division=0)
     }
 
+def _register_models(train_params: Dict[str, Any], fitted: Dict[str, Any], metrics: Dict[str, Any],
+                     vocabulary, idf: np.ndarray, n_features: int = None,
+                     gaussian_features: int = None) -> str:
+    """Guarda vectorizador + modelos en el registro local y devuelve su id."""
+    data_hash = _data_hash()
+    mid = nb_registry.model_id(train_params, data_hash)
+    if not nb_registry.has_model(mid):
+        meta = {
+            "params": train_params,
+            "data_hash": data_hash,
+            "classes": fitted["MultinomialNB"].classes_.tolist(),
+            "models": list(fitted),
+            "metrics": metrics,
+        }
+        if n_features is not None:
+            meta["n_features"] = n_features
+        if gaussian_features is not None:
+            meta["gaussian_features"] = gaussian_features
+        nb_registry.save_model(mid, meta, vocabulary, nb_registry.export_arrays(fitted, idf))
+    return mid
+
+def _read_chunks(chunk_rows: int, lowercase: bool):
+    """Recorre el CSV por bloques de `chunk_rows` filas: (mensajes, etiquetas)."""
+    reader = pd.read_csv(
+        DATA_PATH,
+        encoding="latin1",
+        encoding_errors="replace",
+        usecols=['v1', 'v2'],
+        chunksize=chunk_rows
+    )
+    for chunk in reader:
+        labels = chunk['v1'].map({'ham': 0, 'spam': 1})
+        keep = labels.notna().to_numpy()
+        messages = chunk['v2'].fillna("").astype(str)[keep]
+        if lowercase:
+            messages = messages.str.lower()
+        yield messages.tolist(), labels[keep].to_numpy(dtype=np.int64)
+
+def _stream_split(chunk_rows: int, lowercase: bool, test_size: float, random_state: int):
+    """
+    Bloques con máscara de test reproducible: cada fila cae en test con
+    probabilidad `test_size`, con la misma semilla en todas las pasadas.
+    """
+    for i, (messages, y) in enumerate(_read_chunks(chunk_rows, lowercase)):
+        is_test = np.random.default_rng([random_state, i]).random(len(y)) < test_size
+        yield messages, y, is_test
+
+def _run_naive_bayes_streaming(params: Dict[str, Any], verbosity: str) -> Dict[str, Any]:
+    """
+    Entrenamiento out-of-core: el CSV se lee por bloques y cada bloque se
+    vectoriza con HashingVectorizer (sin vocabulario global). Tres pasadas
+    con memoria acotada por el tamaño de bloque y `n_features`:
+      1. partial_fit de Bernoulli/Multinomial y frecuencias documentales (idf)
+      2. estadísticos de GaussianNB sobre TF-IDF con el idf ya conocido, en
+         su propio espacio de `gaussian_features` columnas
+      3. evaluación, acumulando la matriz de confusión de cada modelo
+    """
+    test_size = params.get("test_size", 0.2)
+    random_state = params.get("random_state", 42)
+    lowercase = params.get("lowercase", True)
+    n_features = int(params.get("n_features", HASHING_FEATURES_DEFAULT))
+    gaussian_features = int(params.get("gaussian_features", GAUSSIAN_HASHING_FEATURES_DEFAULT))
+    chunk_rows = int(params.get("chunk_rows", STREAM_CHUNK_ROWS_DEFAULT))
+    if n_features < 2 or gaussian_features < 2 or chunk_rows < 1:
+        raise ValueError("'n_features' y 'gaussian_features' deben ser al menos 2 y 'chunk_rows' positivo.")
+
+    vect = nb_registry.hashing_vectorizer(n_features)
+    gaussian_vect = nb_registry.hashing_vectorizer(gaussian_features)
+    classes = np.array([0, 1])
+    bernoulli, multinomial = BernoulliNB(), MultinomialNB()
+    doc_freq = np.zeros(gaussian_features)
+    n_train = n_test = 0
+
+    def chunks():
+        for messages, y, is_test in _stream_split(chunk_rows, lowercase, test_size, random_state):
+            yield messages, y, is_test, vect.transform(messages).tocsr(), gaussian_vect.transform(messages).tocsr()
+
+    # 1. Modelos discretos + idf
+    for _, y, is_test, Xc, Xg in chunks():
+        train = ~is_test
+        if train.any():
+            Xtr = Xc[train]
+            multinomial.partial_fit(Xtr, y[train], classes=classes)
+            bernoulli.partial_fit(_binary(Xtr), y[train], classes=classes)
+            doc_freq += np.bincount(Xg[train].indices, minlength=gaussian_features)
+            n_train += int(train.sum())
+        n_test += int(is_test.sum())
+    if n_train == 0 or n_test == 0:
+        raise ValueError("El modo streaming necesita filas de entrenamiento y de test (revisa 'test_size').")
+
+    # Mismo idf que TfidfTransformer(smooth_idf=True) + normalización l2
+    idf = np.log((1 + n_train) / (1 + doc_freq)) + 1
+
+    def tfidf(Xc):
+        X = Xc.multiply(idf).tocsr()
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return X.multiply(1.0 / norms[:, None]).tocsr()
+
+    # 2. GaussianNB por estadísticos acumulados
+    stats = None
+    for _, y, is_test, _, Xg in chunks():
+        train = ~is_test
+        if train.any():
+            stats = _gaussian_stats(tfidf(Xg[train]), y[train], classes, stats)
+    gaussian = _gaussian_from_stats(stats, classes)
+
+    # 3. Evaluación en streaming
+    fitted = {"BernoulliNB": bernoulli, "MultinomialNB": multinomial, "GaussianNB": gaussian}
+    confusion = {name: np.zeros((2, 2), dtype=np.int64) for name in fitted}
+    samples = []
+    for messages, y, is_test, Xc, Xg in chunks():
+        if not is_test.any():
+            continue
+        Xte, yte = Xc[is_test], y[is_test]
+        preds = {
+            "BernoulliNB": bernoulli.predict(_binary(Xte)),
+            "MultinomialNB": multinomial.predict(Xte),
+            "GaussianNB": _gaussian_predict_sparse(gaussian, tfidf(Xg[is_test])),
+        }
+        test_messages = [m for m, t in zip(messages, is_test) if t]
+        for name, y_pred in preds.items():
+            np.add.at(confusion[name], (yte, y_pred), 1)
+            if verbosity in ("first", "all") and sum(s["model"] == name for s in samples) < 5:
+                for msg, true, pred in list(zip(test_messages, yte, y_pred))[:5]:
+                    samples.append({"message": msg, "true": int(true), "pred": int(pred), "model": name})
+
+    metrics = {name: _metrics_from_confusion(cm) for name, cm in confusion.items()}
+    model_bytes = sum(
+        a.nbytes for a in nb_registry.export_arrays(fitted, idf).values()
+    )
+    result: Dict[str, Any] = {
+        "metrics": metrics,
+        "memory": {
+            "chunk_rows": chunk_rows,
+            "n_features": n_features,
+            "gaussian_features": gaussian_features,
+            "model_bytes": int(model_bytes),
+            "train_rows": n_train,
+            "test_rows": n_test,
+        }
+    }
+    if verbosity in ("first", "all"):
+        result["confusion"] = {name: cm.tolist() for name, cm in confusion.items()}
+        result["samples"] = samples
+
+    if params.get("register", False):
+        train_params = {"mode": "streaming", "test_size": test_size, "random_state": random_state,
+                        "lowercase": lowercase, "n_features": n_features,
+                        "gaussian_features": gaussian_features, "chunk_rows": chunk_rows}
+        result["model_id"] = _register_models(train_params, fitted, metrics, None, idf,
+                                              n_features, gaussian_features)
+
+    return {
+        "history": [],
+        "first_epoch": None,
+        "final": result
+    }
+
+def _cv_pool(cv_folds: int) -> ProcessPoolExecutor:
+    # Cada proceso carga el CSV al arrancar y lo conserva en su caché: las
+    # tareas sólo reciben enteros y el dataset no se serializa nunca. El pool
+    # vive sólo durante la validación cruzada (ver _run_naive_bayes_cv)
+    return ProcessPoolExecutor(max_workers=min(CV_WORKERS, cv_folds), initializer=_get_dataset,
+                               mp_context=get_context("forkserver"))
+
+def _cv_task(fold: Tuple[int, int], random_state: int, lowercase: bool, name: str,
+             gaussian_mode: str, chunk_size: int) -> Dict[str, Any]:
+    # Se ejecuta en un proceso del pool: un modelo en un pliegue
+    features = _get_features(None, random_state, lowercase, fold)
+    _, y_pred = _fit_predict(name, features, gaussian_mode, chunk_size)
+    y_test = features["split"][3]
+    return {
+        "fold": fold[1],
+        "model": name,
+        "metrics": _compute_metrics(y_test, y_pred),
+        "confusion": confusion_matrix(y_test, y_pred, labels=[0, 1]).tolist(),
+    }
+
+def _run_naive_bayes_cv(params: Dict[str, Any], gaussian_mode: str, chunk_size: int) -> Dict[str, Any]:
+    """
+    Validación cruzada estratificada de k pliegues: cada par (pliegue, modelo)
+    es una tarea del pool de procesos.
+    """
+    cv_folds = params["cv_folds"]
+    if not isinstance(cv_folds, int) or cv_folds < 2:
+        raise ValueError("'cv_folds' debe ser un entero mayor o igual que 2.")
+    random_state = params.get("random_state", 42)
+    lowercase = params.get("lowercase", True)
+    _, df = _get_dataset()
+    if df['label'].value_counts().min() < cv_folds:
+        raise ValueError("'cv_folds' no puede superar el número de mensajes de la clase minoritaria.")
+
+    # El pool se cierra al terminar: la ejecución puede estar a su vez en un
+    # proceso del planificador y no debe dejar procesos hijos vivos
+    with _cv_pool(cv_folds) as pool:
+        futures = [
+            pool.submit(_cv_task, (cv_folds, i), random_state, lowercase, name, gaussian_mode, chunk_size)
+            for i in range(cv_folds)
+            for name in MODEL_NAMES
+        ]
+        tasks = [f.result() for f in futures]
+
+    folds: List[Dict[str, Any]] = [{"fold": i, "metrics": {}, "confusion": {}} for i in range(cv_folds)]
+    for task in tasks:
+        folds[task["fold"]]["metrics"][task["model"]] = task["metrics"]
+        folds[task["fold"]]["confusion"][task["model"]] = task["confusion"]
+
+    metrics, std, confusion = {}, {}, {}
+    for name in MODEL_NAMES:
+        per_fold = [fold["metrics"][name] for fold in folds]
+        metrics[name] = {m: float(np.mean([f[m] for f in per_fold])) for m in per_fold[0]}
+        std[name] = {m: float(np.std([f[m] for f in per_fold])) for m in per_fold[0]}
+        confusion[name] = np.sum([fold["confusion"][name] for fold in folds], axis=0).tolist()
+
+    return {
+        "history": [],
+        "first_epoch": None,
+        "final": {
+            "metrics": metrics,
+            "confusion": confusion,
+            "cv": {"folds": folds, "std": std, "n_folds": cv_folds}
+        }
+    }
+
+def _metrics_from_confusion(cm: np.ndarray) -> Dict[str, float]:
+    """accuracy, precision, recall y f1 a partir de [[TN, FP], [FN, TP]]."""
+    (tn, fp), (fn, tp) = cm.tolist()
+    total = tn + fp + fn + tp
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        "accuracy": (tp + tn) / total if total else 0.0,
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    }
+
 def run_naive_bayes(params: Dict[str, Any], verbosity: str) -> Dict[str, Any]:
     """
     :param params: {
         "test_size": float (entre 0 y 1),
         "random_state": int,
         # opcionalmente flags de limpieza: "lowercase": bool, ...
+        "gaussian_mode": "sparse" | "chunked",
+        "gaussian_chunk_size": int (filas densificadas a la vez en "chunked"),
+        "register": bool (guardar los modelos en el registro local, por defecto False),
+        "mode": "memory" | "streaming" (CSV por bloques + HashingVectorizer + partial_fit),
+        "n_features": int, "chunk_rows": int (sólo en modo streaming),
+        "cv_folds": int (validación cruzada estratificada en paralelo; ignora test_size),
     }
     :param verbosity: "first"|"all"|"final"
     :returns: {
@@ -57,63 +551,50 @@ def run_naive_bayes(params: Dict[str, Any], verbosity: str) -> Dict[str, Any]:
       #    "BernoulliNB": [[TN, FP],[FN, TP]], …
       # }
       # opcionalmente "samples": [ { "message":..., "true":0, "pred":1 }, … ] 
+      "memory": { bytes de las matrices de características, ... },
+      "model_id": id en el registro (para /predict/nb)
+      # con cv_folds: "metrics" son las medias y "cv" trae pliegues, desviaciones
+      # y matrices de confusión sumadas
     }
     """
-    # 1. Carga y limpieza
-    df = _load_dataset()
-    if params.get("lowercase", True):
-        df['message'] = df['message'].str.lower()
-    # … aquí podrías añadir más preprocessing según params …
+    mode = params.get("mode", "memory")
+    if mode == "streaming":
+        return _run_naive_bayes_streaming(params, verbosity)
+    if mode != "memory":
+        raise ValueError("'mode' debe ser 'memory' o 'streaming'.")
 
-    # 2. División
-    test_size = params.get("test_size", 0.2)
-    random_state = params.get("random_state", 42)
-    X_train, X_test, y_train, y_test = train_test_split(
-        df['message'], df['label'],
-        test_size=test_size,
-        random_state=random_state,
-        stratify=df['label']
-    )
+    gaussian_mode = params.get("gaussian_mode", GAUSSIAN_MODE_DEFAULT)
+    chunk_size = params.get("gaussian_chunk_size", GAUSSIAN_CHUNK_SIZE_DEFAULT)
+    if gaussian_mode not in ("sparse", "chunked"):
+        raise ValueError("'gaussian_mode' debe ser 'sparse' o 'chunked'.")
+    if chunk_size < 1:
+        raise ValueError("'gaussian_chunk_size' debe ser un entero positivo.")
 
-    # 3. Vectorización
-    vect_bern = CountVectorizer(binary=True)
-    Xb_train = vect_bern.fit_transform(X_train)
-    Xb_test  = vect_bern.transform(X_test)
+    if params.get("cv_folds"):
+        return _run_naive_bayes_cv(params, gaussian_mode, chunk_size)
 
-    vect_mul = CountVectorizer()
-    Xm_train = vect_mul.fit_transform(X_train)
-    Xm_test  = vect_mul.transform(X_test)
+    # 1-2. Carga, limpieza y división (desde caché)
+    test_size = params.get("test_size", 0.2)
+    random_state = params.get("random_state", 42)
+    lowercase = params.get("lowercase", True)
+    features = _get_features(test_size, random_state, lowercase)
+    X_train, X_test, y_train, y_test = features["split"]
 
-    vect_tfidf = TfidfVectorizer()
-    Xt_train = vect_tfidf.fit_transform(X_train).toarray()
-    Xt_test  = vect_tfidf.transform(X_test).toarray()
+    # 3. Vectorización (compartida, desde caché)
+    Xb_train, Xb_test = features["binary"]
+    Xm_train, Xm_test = features["counts"]
+    Xt_train, Xt_test = features["tfidf"]
 
     # 4. Entrenamiento
-    models = {
-        "BernoulliNB": BernoulliNB(),
-        "MultinomialNB": MultinomialNB(),
-        "GaussianNB": GaussianNB()
-    }
-    data_train = {
-        "BernoulliNB": (Xb_train, y_train),
-        "MultinomialNB": (Xm_train, y_train),
-        "GaussianNB": (Xt_train, y_train)
-    }
-    data_test = {
-        "BernoulliNB": (Xb_test, y_test),
-        "MultinomialNB": (Xm_test, y_test),
-        "GaussianNB": (Xt_test, y_test)
-    }
-
     metrics = {}
     confusion = {}
     samples = []
+    fitted = {}
 
-    for name, model in models.items():
-        Xtr, ytr = data_train[name]
-        Xte, yte = data_test[name]
-        model.fit(Xtr, ytr)
-        y_pred = model.predict(Xte)
+    for name in MODEL_NAMES:
+        model, y_pred = _fit_predict(name, features, gaussian_mode, chunk_size)
+        yte = y_test
+        fitted[name] = model
 
         metrics[name] = _compute_metrics(yte, y_pred)
         confusion[name] = confusion_matrix(yte, y_pred).tolist()
@@ -129,12 +610,36 @@ def run_naive_bayes(params: Dict[str, Any], verbosity: str) -> Dict[str, Any]:
                     "model": name
                 })
 
+    # Memoria de las matrices de características (nunca se densifican enteras)
+    n_features = Xt_train.shape[1]
+    memory = {
+        "features_train_bytes": _sparse_nbytes(Xm_train) + _sparse_nbytes(Xb_train) + _sparse_nbytes(Xt_train),
+        "features_test_bytes": _sparse_nbytes(Xm_test) + _sparse_nbytes(Xb_test) + _sparse_nbytes(Xt_test),
+        "gaussian_peak_dense_bytes": (
+            min(chunk_size, Xt_train.shape[0]) * n_features * 8 if gaussian_mode == "chunked" else 0
+        ),
+        "dense_tfidf_bytes_avoided": (Xt_train.shape[0] + Xt_test.shape[0]) * n_features * 8,
+    }
+
     result: Dict[str, Any] = {
-        "metrics": metrics
+        "metrics": metrics,
+        "memory": memory
     }
     if verbosity in ("first", "all"):
         result["confusion"] = confusion
         result["samples"] = samples
+
+    # 5. Registro del vectorizador + modelos (idempotente por parámetros y datos)
+    if params.get("register", False):
+        train_params = {"test_size": test_size, "random_state": random_state, "lowercase": lowercase,
+                        "gaussian_mode": gaussian_mode}
+        if gaussian_mode == "chunked":
+            train_params["gaussian_chunk_size"] = chunk_size
+        result["model_id"] = _register_models(
+            train_params, fitted, metrics,
+            features["vectorizer"].get_feature_names_out().tolist(), features["idf"],
+        )
+
     return {
         "history": [],          # NB no usa history de generaciones
         "first_epoch": None,    # NB no tiene primera iteración análoga
@@ -0,0 +1,202 @@
+# app/algorithms/nb_online.py
+
+import json
+import os
+import re
+import threading
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from sklearn.naive_bayes import BernoulliNB, MultinomialNB
+
+from app.algorithms import nb, nb_registry
+
+# Modelos Naive Bayes incrementales.
+#
+# Un modelo online tiene nombre y una cadena de versiones en el registro de
+# nb_registry. Cada versión guarda, además de los pesos para /predict/nb,
+# los contadores (feature_count_, class_count_) de MultinomialNB y
+# BernoulliNB; una actualización los carga, aplica `partial_fit` con el lote
+# etiquetado y publica la versión siguiente. El espacio de características es
+# por hashing, así que los términos nuevos no obligan a reajustar nada.
+#
+# Las métricas de cada versión (sobre la partición de test del CSV) se
+# calculan sólo cuando se piden y se guardan junto a la versión.
+#
+# Cada modelo online tiene un índice MODEL_DIR/online/<nombre>.json con los
+# model_id de sus versiones en orden, así una actualización no recorre el
+# registro entero. Los mensajes de los lotes no se guardan: sólo los
+# contadores que resultan de ellos.
+
+ONLINE_FEATURES_DEFAULT = nb.HASHING_FEATURES_DEFAULT
+ONLINE_MODELS = ("MultinomialNB", "BernoulliNB")
+LABEL_VALUES = {"ham": 0, "spam": 1, 0: 0, 1: 1}
+
+_update_lock = threading.Lock()
+
+
+def _check_name(name: str) -> str:
+    if not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", name or ""):
+        raise ValueError("El nombre del modelo online sólo admite letras, dígitos, '_' y '-'.")
+    return name
+
+
+def _labels(labels: List[Any]) -> np.ndarray:
+    try:
+        return np.array([LABEL_VALUES[label] for label in labels], dtype=np.int64)
+    except (KeyError, TypeError):
+        raise ValueError("Las etiquetas deben ser 'ham'/'spam' o 0/1.")
+
+
+def _index_path(name: str) -> str:
+    return os.path.join(nb_registry.MODEL_DIR, "online", f"{_check_name(name)}.json")
+
+
+def _read_index(name: str) -> List[str]:
+    """model_id de cada versión: el de la versión v está en la posición v-1."""
+    path = _index_path(name)
+    if not os.path.isfile(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["versions"]
+
+
+def _write_index(name: str, model_ids: List[str]) -> None:
+    path = _index_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"name": name, "versions": model_ids}, f)
+    os.replace(tmp, path)
+
+
+def _version_meta(mid: str) -> Dict[str, Any]:
+    meta = nb_registry.read_json(mid, "meta.json")
+    meta["metrics"] = nb_registry.read_json(mid, "metrics.json")
+    return meta
+
+
+def list_versions(name: str) -> List[Dict[str, Any]]:
+    """Metadatos de las versiones del modelo, de la más antigua a la más reciente."""
+    return [_version_meta(mid) for mid in _read_index(name)]
+
+
+def _get_version(name: str, version: Optional[int] = None) -> Dict[str, Any]:
+    model_ids = _read_index(name)
+    if not model_ids:
+        raise ValueError(f"No existe el modelo online '{name}'.")
+    if version is None:
+        return _version_meta(model_ids[-1])
+    if not 1 <= version <= len(model_ids):
+        raise ValueError(f"El modelo online '{name}' no tiene la versión {version}.")
+    return _version_meta(model_ids[version - 1])
+
+
+def _restore(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Reconstruye los estimadores de sklearn a partir de los contadores guardados."""
+    arrays = nb_registry.load_model(meta["model_id"])["arrays"]
+    models = {}
+    for name in ONLINE_MODELS:
+        model = MultinomialNB() if name == "MultinomialNB" else BernoulliNB()
+        model.classes_ = np.asarray(meta["classes"])
+        model.class_count_ = np.array(arrays[f"{name}.class_count"])
+        model.feature_count_ = np.array(arrays[f"{name}.feature_count"])
+        model.n_features_in_ = meta["n_features"]
+        models[name] = model
+    return models
+
+
+def _publish(name: str, version: int, parent: Optional[str], params: Dict[str, Any], models: Dict[str, Any],
+             n_samples: int, batch: Dict[str, Any]) -> Dict[str, Any]:
+    arrays = nb_registry.export_arrays(models, None)
+    for model_name, model in models.items():
+        arrays[f"{model_name}.class_count"] = model.class_count_
+        arrays[f"{model_name}.feature_count"] = model.feature_count_
+
+    mid = nb_registry.model_id({"online": name, "version": version, "parent": parent}, batch["hash"])
+    meta = {
+        "params": params,
+        "n_features": params["n_features"],
+        "classes": models["MultinomialNB"].classes_.tolist(),
+        "models": list(models),
+        "online": {"name": name, "version": version, "parent": parent,
+                   "n_samples": n_samples, "batch_size": batch["size"]},
+    }
+    nb_registry.save_model(mid, meta, None, arrays)
+    _write_index(name, _read_index(name) + [mid])
+    return {**meta, "model_id": mid, "metrics": None}
+
+
+def create_online_model(name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Crea la versión 1 del modelo entrenando con la partición de entrenamiento
+    del CSV (mismos parámetros que run_naive_bayes).
+    """
+    _check_name(name)
+    params = {
+        "test_size": params.get("test_size", 0.2),
+        "random_state": params.get("random_state", 42),
+        "lowercase": params.get("lowercase", True),
+        "n_features": int(params.get("n_features", ONLINE_FEATURES_DEFAULT)),
+    }
+    if params["n_features"] < 2:
+        raise ValueError("'n_features' debe ser al menos 2.")
+
+    with _update_lock:
+        if _read_index(name):
+            raise ValueError(f"El modelo online '{name}' ya existe.")
+        X_train, _, y_train, _ = nb._get_split(params["test_size"], params["random_state"], params["lowercase"])
+        X = nb_registry.hashing_vectorizer(params["n_features"]).transform(X_train)
+        models = {
+            "MultinomialNB": MultinomialNB().partial_fit(X, y_train, classes=[0, 1]),
+            "BernoulliNB": BernoulliNB().partial_fit(X, y_train, classes=[0, 1]),
+        }
+        return _publish(name, 1, None, params, models, X.shape[0],
+                        {"hash": nb._data_hash(), "size": X.shape[0]})
+
+
+def update_online_model(name: str, messages: List[str], labels: List[Any]) -> Dict[str, Any]:
+    """
+    Añade mensajes etiquetados: actualiza los contadores de la última versión
+    con `partial_fit` y publica una versión nueva.
+    """
+    if len(messages) != len(labels):
+        raise ValueError("'messages' y 'labels' deben tener la misma longitud.")
+    if not messages:
+        raise ValueError("Se requiere al menos un mensaje etiquetado.")
+    y = _labels(labels)
+
+    with _update_lock:
+        latest = _get_version(name)
+        params = latest["params"]
+        texts = [m.lower() for m in messages] if params["lowercase"] else messages
+        X = nb_registry.hashing_vectorizer(params["n_features"]).transform(texts)
+
+        models = _restore(latest)
+        for model in models.values():
+            model.partial_fit(X, y)
+
+        # El lote sólo entra en el identificador de la versión (por hash)
+        batch_hash = nb_registry.model_id({"messages": messages, "labels": y.tolist()}, "")
+        return _publish(
+            name, latest["online"]["version"] + 1, latest["model_id"], params, models,
+            latest["online"]["n_samples"] + len(messages),
+            {"hash": batch_hash, "size": len(messages)},
+        )
+
+
+def version_metrics(name: str, version: Optional[int] = None) -> Dict[str, Any]:
+    """Métricas de la versión sobre la partición de test; se calculan una sola vez."""
+    meta = _get_version(name, version)
+    if meta["metrics"] is not None:
+        return meta["metrics"]
+
+    params = meta["params"]
+    _, X_test, _, y_test = nb._get_split(params["test_size"], params["random_state"], params["lowercase"])
+    messages = list(X_test)
+    metrics = {
+        model: nb._compute_metrics(y_test, nb_registry.predict(meta["model_id"], messages, model)["predictions"])
+        for model in meta["models"]
+    }
+    nb_registry.write_json(meta["model_id"], "metrics.json", metrics)
+    return metrics
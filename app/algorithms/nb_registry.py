@@ -0,0 +1,229 @@
+# app/algorithms/nb_registry.py
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+
+# Registro local de modelos Naive Bayes entrenados.
+#
+# Cada modelo es un directorio MODEL_DIR/<model_id>/ con:
+#   - meta.json: parámetros de entrenamiento, hash de los datos, clases,
+#     métricas y lista de modelos incluidos
+#   - vocabulary.json: términos del vectorizador, en orden de columna (o
+#     None si el modelo usa un espacio de características por hashing; en
+#     ese caso GaussianNB puede tener el suyo, meta["gaussian_features"])
+#   - <array>.npy: pesos en .npy sin comprimir, que se abren con mmap
+#
+# Los tres clasificadores se guardan como puntuaciones lineales (más un
+# término cuadrático en GaussianNB), así la predicción de un lote es un par
+# de productos matriz dispersa × matriz sin pasar por sklearn.
+
+# Fuera de data/, que se sirve públicamente como estático en /data
+MODEL_DIR = os.getenv("NB_MODEL_DIR", "saved_models/nb")
+LOADED_CACHE_SIZE = int(os.getenv("NB_LOADED_MODELS", "8"))
+LABELS = {0: "ham", 1: "spam"}
+
+_lock = threading.Lock()
+_loaded: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def model_id(train_params: Dict[str, Any], data_hash: str) -> str:
+    """Identificador del modelo: hash de los parámetros de entrenamiento y de los datos."""
+    canonical = json.dumps({"params": train_params, "data": data_hash}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _model_path(mid: str) -> str:
+    if not mid or not all(c in "0123456789abcdef" for c in mid):
+        raise ValueError(f"Identificador de modelo inválido: {mid}")
+    return os.path.join(MODEL_DIR, mid)
+
+
+def has_model(mid: str) -> bool:
+    return os.path.isfile(os.path.join(_model_path(mid), "meta.json"))
+
+
+def hashing_vectorizer(n_features: int) -> HashingVectorizer:
+    """Espacio de características por hashing: términos nuevos sin reajustar el vocabulario."""
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+
+
+def save_model(mid: str, meta: Dict[str, Any], vocabulary: Optional[List[str]],
+               arrays: Dict[str, np.ndarray]) -> None:
+    """
+    Escribe el modelo en un directorio temporal y lo publica con un rename
+    atómico, para que un lector nunca vea un artefacto a medias.
+    """
+    if has_model(mid):
+        return
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=MODEL_DIR, prefix=".tmp-")
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(tmp, "vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump(vocabulary, f)
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({**meta, "model_id": mid, "arrays": sorted(arrays)}, f)
+        os.replace(tmp, _model_path(mid))
+    except OSError:
+        # Otro proceso publicó el mismo modelo a la vez
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not has_model(mid):
+            raise
+
+
+def write_json(mid: str, filename: str, data: Any) -> None:
+    """Adjunta un fichero JSON auxiliar (p. ej. métricas calculadas después) al modelo."""
+    path = os.path.join(_model_path(mid), filename)
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def read_json(mid: str, filename: str) -> Optional[Any]:
+    path = os.path.join(_model_path(mid), filename)
+    if not os.path.isfile(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_models() -> List[Dict[str, Any]]:
+    """Metadatos de todos los modelos registrados."""
+    if not os.path.isdir(MODEL_DIR):
+        return []
+    models = []
+    for mid in sorted(os.listdir(MODEL_DIR)):
+        meta_path = os.path.join(MODEL_DIR, mid, "meta.json")
+        if not mid.startswith(".") and os.path.isfile(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                models.append(json.load(f))
+    return models
+
+
+def load_model(mid: str) -> Dict[str, Any]:
+    """
+    Abre el modelo (pesos con mmap) y el vectorizador con vocabulario fijo.
+    Se mantienen en memoria los LOADED_CACHE_SIZE modelos más usados.
+    """
+    with _lock:
+        if mid in _loaded:
+            _loaded.move_to_end(mid)
+            return _loaded[mid]
+
+    path = _model_path(mid)
+    if not has_model(mid):
+        raise ValueError(f"Modelo no registrado: {mid}")
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    with open(os.path.join(path, "vocabulary.json"), encoding="utf-8") as f:
+        vocabulary = json.load(f)
+    if vocabulary is None:
+        vectorizer = hashing_vectorizer(meta["n_features"])
+    else:
+        vectorizer = CountVectorizer(vocabulary=vocabulary)
+    bundle = {
+        "meta": meta,
+        "vectorizer": vectorizer,
+        "gaussian_vectorizer": (
+            hashing_vectorizer(meta["gaussian_features"]) if "gaussian_features" in meta else vectorizer
+        ),
+        "arrays": {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in meta["arrays"]
+        },
+    }
+    with _lock:
+        _loaded[mid] = bundle
+        while len(_loaded) > LOADED_CACHE_SIZE:
+            _loaded.popitem(last=False)
+    return bundle
+
+
+def _scores(bundle: Dict[str, Any], model: str, Xc) -> np.ndarray:
+    """Log-verosimilitud conjunta (n_mensajes × n_clases) del modelo elegido."""
+    a = bundle["arrays"]
+    if model == "MultinomialNB":
+        X = Xc
+    elif model == "BernoulliNB":
+        X = Xc.copy()
+        X.data[:] = 1
+    else:
+        # TF-IDF con la misma normalización l2 que en el entrenamiento
+        X = Xc.multiply(a["idf"]).tocsr()
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        X = X.multiply(1.0 / norms[:, None]).tocsr()
+    jll = np.asarray(X @ a[f"{model}.coef"].T) + a[f"{model}.intercept"]
+    if f"{model}.quad" in a:
+        jll += np.asarray(X.multiply(X) @ a[f"{model}.quad"].T)
+    return jll
+
+
+def predict(mid: str, messages: List[str], model: str = "MultinomialNB") -> Dict[str, Any]:
+    """
+    Clasifica un lote de mensajes en una sola pasada vectorizada.
+
+    :return: {"predictions": [0|1, ...], "labels": ["ham"|"spam", ...],
+              "spam_probability": [float, ...]}
+    """
+    bundle = load_model(mid)
+    if model not in bundle["meta"]["models"]:
+        raise ValueError(f"El modelo '{model}' no está en el registro {mid}: {bundle['meta']['models']}")
+    if not messages:
+        return {"predictions": [], "labels": [], "spam_probability": []}
+
+    texts = [m.lower() for m in messages] if bundle["meta"]["params"].get("lowercase", True) else messages
+    vectorizer = bundle["gaussian_vectorizer"] if model == "GaussianNB" else bundle["vectorizer"]
+    jll = _scores(bundle, model, vectorizer.transform(texts).tocsr())
+
+    classes = np.asarray(bundle["meta"]["classes"])
+    jll -= jll.max(axis=1, keepdims=True)
+    proba = np.exp(jll)
+    proba /= proba.sum(axis=1, keepdims=True)
+    preds = classes[np.argmax(jll, axis=1)]
+    spam_col = int(np.flatnonzero(classes == 1)[0]) if (classes == 1).any() else -1
+    return {
+        "predictions": preds.tolist(),
+        "labels": [LABELS.get(int(p), str(p)) for p in preds],
+        "spam_probability": proba[:, spam_col].tolist() if spam_col >= 0 else [0.0] * len(preds),
+    }
+
+
+def export_arrays(models: Dict[str, Any], idf: Optional[np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Convierte los clasificadores ajustados en pesos lineales:
+    jll = X · coefᵀ + intercept (+ X² · quadᵀ en GaussianNB).
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    if "MultinomialNB" in models:
+        m = models["MultinomialNB"]
+        arrays["MultinomialNB.coef"] = m.feature_log_prob_
+        arrays["MultinomialNB.intercept"] = m.class_log_prior_
+    if "BernoulliNB" in models:
+        m = models["BernoulliNB"]
+        neg = np.log1p(-np.exp(m.feature_log_prob_))
+        arrays["BernoulliNB.coef"] = m.feature_log_prob_ - neg
+        arrays["BernoulliNB.intercept"] = m.class_log_prior_ + neg.sum(axis=1)
+    if "GaussianNB" in models:
+        m = models["GaussianNB"]
+        inv_var = 1.0 / m.var_
+        arrays["GaussianNB.coef"] = m.theta_ * inv_var
+        arrays["GaussianNB.quad"] = -0.5 * inv_var
+        arrays["GaussianNB.intercept"] = (
+            np.log(m.class_prior_)
+            - 0.5 * np.log(2.0 * np.pi * m.var_).sum(axis=1)
+            - 0.5 * (m.theta_ ** 2 * inv_var).sum(axis=1)
+        )
+        arrays["idf"] = idf
+    return arrays
@@ -12,6 +12,10 @@ model = AutoModelForTokenClassification.from_pretrained(MODEL_NAME, cache_dir=CA
 # Crear pipeline de reconocimiento de entidades
 nlp = pipeline("ner", model=model, tokenizer=tokenizer, grouped_entities=True)
 
+def warmup() -> None:
+    """Inferencia de prueba para inicializar el pipeline antes de la primera petición."""
+    nlp("Warmup in Madrid.")
+
 def run_ner_text(text: str, verbosity: str = "final") -> dict:
     """
     Ejecuta el análisis NER sobre el texto dado.
@@ -1,5 +1,7 @@
 import math
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+import numpy as np
 
 # Puedes definir aquí valores por defecto (del ejemplo del PDF)
 DEFAULT_WEIGHTS_IH = [[0.1, 0.2], [0.3, 0.4]]   # ejemplo
@@ -12,6 +14,17 @@ DEFAULT_DATASET = [
 ]
 DEFAULT_LR = 0.25
 
+# Motor NumPy (red multicapa por lotes)
+ENGINE_DEFAULT = "manual"          # "manual" (pasos por muestra, 2-2-1) | "numpy"
+DEFAULT_EPOCHS = 1
+RECORD_STEPS_DEFAULT = "epoch"     # "none" | "epoch" | "batch"
+MAX_RUNS = 10000                   # ejecuciones apiladas por petición (inits × learning_rates)
+ACTIVATIONS = {
+    "sigmoid": (lambda z: 1 / (1 + np.exp(-z)), lambda a: a * (1 - a)),
+    "tanh": (np.tanh, lambda a: 1 - a ** 2),
+    "relu": (lambda z: np.maximum(z, 0), lambda a: (a > 0).astype(a.dtype)),
+}
+
 def sigmoid(z: float) -> float:
     return 1 / (1 + math.exp(-z))
 
@@ -19,7 +32,7 @@ def sigmoid_derivative(output: float) -> float:
     # dσ/dz = σ(z)*(1-σ(z)), pero si ya tienes σ(z)=output:
     return output * (1 - output)
 
-def _run_nn(params: Dict[str, Any]) -> Dict[str, Any]:
+def _run_nn(params: Dict[str, Any], on_step: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
     # 1. Leer parámetros o usar defaults
     w_ih = params.get("w_ih", DEFAULT_WEIGHTS_IH)  # 2×2
     w_ho = params.get("w_ho", DEFAULT_WEIGHTS_HO)  # 2
@@ -69,8 +82,8 @@ def _run_nn(params: Dict[str, Any]) -> Dict[str, Any]:
             for j in range(2)
         ]
 
-        # 2.6 Registrar paso
-        steps.append({
+        # 2.6 Registrar paso (o entregarlo al callback sin acumularlo)
+        step = {
             "x": [x1, x2],
             "y_true": y_true,
             "net_h": net_h,
@@ -81,20 +94,275 @@ def _run_nn(params: Dict[str, Any]) -> Dict[str, Any]:
             "delta_h": delta_h,
             "w_ih_updated": w_ih,
             "w_ho_updated": w_ho,
-        })
+        }
+        if on_step is not None:
+            on_step(step)
+        else:
+            steps.append(step)
 
     return {"steps": steps, "final_weights": {"w_ih": w_ih, "w_ho": w_ho}}
 
-def run_nn_manual(params: Dict[str, Any], verbosity: str) -> Dict[str, Any]:
+def _nn_dataset(params: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Datos de entrenamiento como matrices: `X`/`Y` columnares (recomendado para
+    miles de filas) o la lista `dataset` de {x, y} del modo manual.
+    """
+    if "X" in params:
+        if "Y" not in params:
+            raise ValueError("Con 'X' se requiere también 'Y'.")
+        X = np.asarray(params["X"], dtype=np.float64)
+        Y = np.asarray(params["Y"], dtype=np.float64)
+    else:
+        data = params.get("dataset", DEFAULT_DATASET)
+        X = np.asarray([sample["x"] for sample in data], dtype=np.float64)
+        Y = np.asarray([sample["y"] for sample in data], dtype=np.float64)
+    if X.ndim != 2 or len(X) == 0:
+        raise ValueError("El dataset debe ser una lista no vacía de vectores de entrada.")
+    if Y.ndim == 0 or len(Y) != len(X):
+        raise ValueError("X e Y deben tener el mismo número de filas.")
+    Y = Y.reshape(len(Y), -1)
+    return X, Y
+
+def _nn_init_weights(params: Dict[str, Any], layers: List[int], rng: np.random.Generator) -> List[np.ndarray]:
+    """
+    Pesos W[l] de forma (layers[l], layers[l+1]), con la orientación de w_ih
+    (w[i][j]: entrada i -> neurona j). Se toman de `weights`, de w_ih/w_ho
+    para la red 2-2-1, o se inicializan (Xavier uniforme) con `seed`.
+    """
+    if "weights" in params:
+        weights = [np.asarray(w, dtype=np.float64) for w in params["weights"]]
+    elif layers == [2, 2, 1] and ("w_ih" in params or "w_ho" in params or "seed" not in params):
+        weights = [
+            np.asarray(params.get("w_ih", DEFAULT_WEIGHTS_IH), dtype=np.float64),
+            np.asarray(params.get("w_ho", DEFAULT_WEIGHTS_HO), dtype=np.float64).reshape(2, 1),
+        ]
+    else:
+        weights = []
+        for n_in, n_out in zip(layers[:-1], layers[1:]):
+            limit = math.sqrt(6 / (n_in + n_out))
+            weights.append(rng.uniform(-limit, limit, size=(n_in, n_out)))
+
+    if [w.shape for w in weights] != list(zip(layers[:-1], layers[1:])):
+        raise ValueError(f"Las formas de los pesos no encajan con las capas {layers}.")
+    return weights
+
+def _nn_config(params: Dict[str, Any], X: np.ndarray, Y: np.ndarray) -> Dict[str, Any]:
+    """Parámetros comunes de los motores NumPy (una ejecución o apiladas)."""
+    layers = [int(n) for n in params.get("layers", [X.shape[1], 2, Y.shape[1]])]
+    if len(layers) < 2 or min(layers) < 1 or layers[0] != X.shape[1] or layers[-1] != Y.shape[1]:
+        raise ValueError(f"'layers' debe empezar en {X.shape[1]} entradas y acabar en {Y.shape[1]} salidas.")
+    cfg = {
+        "layers": layers,
+        "epochs": int(params.get("epochs", DEFAULT_EPOCHS)),
+        "batch_size": int(params.get("batch_size") or len(X)),
+        "shuffle": bool(params.get("shuffle", False)),
+        "use_bias": bool(params.get("bias", False)),
+        "activation": params.get("activation", "sigmoid"),
+    }
+    if cfg["epochs"] < 1 or cfg["batch_size"] < 1:
+        raise ValueError("'epochs' y 'batch_size' deben ser enteros positivos.")
+    if cfg["activation"] not in ACTIVATIONS:
+        raise ValueError(f"'activation' debe ser una de {sorted(ACTIVATIONS)}.")
+    cfg["acts"] = [ACTIVATIONS[cfg["activation"]]] * (len(layers) - 2) + [ACTIVATIONS["sigmoid"]]
+    return cfg
+
+def _run_nn_numpy(params: Dict[str, Any],
+                  on_step: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Perceptrón multicapa vectorizado: capas arbitrarias, varias épocas y
+    descenso de gradiente por lotes completos o mini-lotes. Misma regla que
+    el modo manual (error cuadrático con salida sigmoide), promediada por lote.
+    """
+    X, Y = _nn_dataset(params)
+    cfg = _nn_config(params, X, Y)
+    layers, epochs, batch_size = cfg["layers"], cfg["epochs"], cfg["batch_size"]
+    use_bias, acts = cfg["use_bias"], cfg["acts"]
+    lr = params.get("learning_rate", DEFAULT_LR)
+    record = params.get("record_steps", RECORD_STEPS_DEFAULT)
+    if record not in ("none", "epoch", "batch"):
+        raise ValueError("'record_steps' debe ser 'none', 'epoch' o 'batch'.")
+
+    rng = np.random.default_rng(params.get("seed"))
+    weights = _nn_init_weights(params, layers, rng)
+    biases = [np.zeros(n) for n in layers[1:]]
+
+    def forward(xb):
+        outs = [xb]
+        for W, b, (f, _) in zip(weights, biases, acts):
+            outs.append(f(outs[-1] @ W + b))
+        return outs
+
+    steps: List[Dict[str, Any]] = []
+    record_step = on_step if on_step is not None else steps.append
+    order = np.arange(len(X))
+    for epoch in range(1, epochs + 1):
+        if cfg["shuffle"]:
+            rng.shuffle(order)
+        for start in range(0, len(X), batch_size):
+            idx = order[start:start + batch_size]
+            outs = forward(X[idx])
+            err = Y[idx] - outs[-1]
+
+            # Retropropagación: delta de cada capa con los pesos previos a la actualización
+            delta = err * acts[-1][1](outs[-1])
+            for layer in range(len(weights) - 1, -1, -1):
+                grad_w = outs[layer].T @ delta / len(idx)
+                grad_b = delta.mean(axis=0)
+                if layer > 0:
+                    delta = (delta @ weights[layer].T) * acts[layer - 1][1](outs[layer])
+                weights[layer] += lr * grad_w
+                if use_bias:
+                    biases[layer] += lr * grad_b
+
+            if record == "batch":
+                record_step({"epoch": epoch, "batch": start // batch_size,
+                             "loss": float(0.5 * (err ** 2).sum(axis=1).mean())})
+
+        if record == "epoch" or epoch == epochs:
+            out = forward(X)[-1]
+            summary = {
+                "epoch": epoch,
+                "loss": float(0.5 * ((Y - out) ** 2).sum(axis=1).mean()),
+                "accuracy": float(((out >= 0.5) == (Y >= 0.5)).all(axis=1).mean()),
+            }
+            if record == "epoch":
+                record_step(summary)
+
+    final_weights: Dict[str, Any] = {"weights": [W.tolist() for W in weights]}
+    if use_bias:
+        final_weights["biases"] = [b.tolist() for b in biases]
+    if layers == [2, 2, 1]:
+        final_weights["w_ih"] = weights[0].tolist()
+        final_weights["w_ho"] = weights[1].ravel().tolist()
+    return {"steps": steps, "final_weights": final_weights, "metrics": summary}
+
+def _run_nn_batched(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Muchas ejecuciones a la vez (inicializaciones × learning rates) con los
+    pesos apilados en tensores (R, n_entrada, n_salida): cada paso de
+    entrenamiento es un único matmul por capa para todas las ejecuciones.
+    """
+    X, Y = _nn_dataset(params)
+    cfg = _nn_config(params, X, Y)
+    layers, epochs, batch_size = cfg["layers"], cfg["epochs"], cfg["batch_size"]
+    use_bias, acts = cfg["use_bias"], cfg["acts"]
+    rng = np.random.default_rng(params.get("seed"))
+
+    # Validamos el número de ejecuciones antes de reservar ningún peso
+    learning_rates = [float(lr) for lr in params.get("learning_rates", [params.get("learning_rate", DEFAULT_LR)])]
+    n_inits = len(params["inits"]) if "inits" in params else int(params.get("n_runs", 1))
+    n_runs = n_inits * len(learning_rates)
+    if n_inits <= 0 or not learning_rates:
+        raise ValueError("Se requiere al menos una inicialización y un learning rate.")
+    if n_runs > MAX_RUNS:
+        raise ValueError(f"Demasiadas ejecuciones ({n_runs}); el máximo es {MAX_RUNS}.")
+
+    # Inicializaciones: explícitas (w_ih/w_ho o weights) o `n_runs` aleatorias
+    if "inits" in params:
+        inits = [_nn_init_weights(init, layers, rng) for init in params["inits"]]
+    else:
+        random_init = {"seed": params.get("seed")}
+        inits = [_nn_init_weights(random_init, layers, rng) for _ in range(n_inits)]
+
+    # Ejecución r = init i con learning rate k, r = i * len(learning_rates) + k
+    weights = [
+        np.repeat(np.stack([init[layer] for init in inits]), len(learning_rates), axis=0)
+        for layer in range(len(layers) - 1)
+    ]
+    biases = [np.zeros((n_runs, 1, n)) for n in layers[1:]]
+    lr = np.tile(learning_rates, len(inits))[:, None, None]
+
+    def forward(xb):
+        outs = [xb]
+        for W, b, (f, _) in zip(weights, biases, acts):
+            outs.append(f(outs[-1] @ W + b))
+        return outs
+
+    def run_loss(out):
+        return 0.5 * ((Y - out) ** 2).sum(axis=2).mean(axis=1)
+
+    loss_every = max(1, int(params.get("loss_every", 1)))
+    loss_epochs: List[int] = []
+    losses: List[np.ndarray] = []
+    order = np.arange(len(X))
+    for epoch in range(1, epochs + 1):
+        if cfg["shuffle"]:
+            rng.shuffle(order)
+        for start in range(0, len(X), batch_size):
+            idx = order[start:start + batch_size]
+            outs = forward(X[idx])
+            delta = (Y[idx] - outs[-1]) * acts[-1][1](outs[-1])
+            for layer in range(len(weights) - 1, -1, -1):
+                grad_w = np.swapaxes(outs[layer], -1, -2) @ delta / len(idx)
+                grad_b = delta.mean(axis=1, keepdims=True)
+                if layer > 0:
+                    delta = (delta @ np.swapaxes(weights[layer], -1, -2)) * acts[layer - 1][1](outs[layer])
+                weights[layer] += lr * grad_w
+                if use_bias:
+                    biases[layer] += lr * grad_b
+        if epoch % loss_every == 0 or epoch == epochs:
+            loss_epochs.append(epoch)
+            losses.append(run_loss(forward(X)[-1]))
+
+    out = forward(X)[-1]
+    final_loss = run_loss(out)
+    accuracy = ((out >= 0.5) == (Y >= 0.5)).all(axis=2).mean(axis=1)
+    best = int(np.nanargmin(np.where(np.isfinite(final_loss), final_loss, np.nan))) if np.isfinite(final_loss).any() else 0
+
+    runs: Dict[str, Any] = {
+        "n_runs": n_runs,
+        "init": np.repeat(np.arange(len(inits)), len(learning_rates)).tolist(),
+        "learning_rate": lr.ravel().tolist(),
+        "loss_epochs": loss_epochs,
+        "loss": np.stack(losses, axis=1).tolist(),
+        "final_loss": final_loss.tolist(),
+        "accuracy": accuracy.tolist(),
+        "weights": [W.tolist() for W in weights],
+    }
+    if use_bias:
+        runs["biases"] = [b[:, 0, :].tolist() for b in biases]
+    if layers == [2, 2, 1]:
+        runs["w_ih"] = weights[0].tolist()
+        runs["w_ho"] = weights[1][:, :, 0].tolist()
+
+    final_weights: Dict[str, Any] = {"best_run": best, "weights": [W[best].tolist() for W in weights]}
+    return {
+        "steps": [],
+        "final_weights": final_weights,
+        "runs": runs,
+        "metrics": {"loss": float(final_loss[best]), "accuracy": float(accuracy[best]), "epoch": epochs},
+    }
+
+def run_nn_manual(params: Dict[str, Any], verbosity: str,
+                  on_step: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
     """
     Ejecuta la red manual capa a capa y devuelve un dict con:
       - history: siempre vacío para NN
       - first_epoch: siempre None para NN
       - final: { steps: [...], final_weights: {...} }
     :param params: { w_ih, w_ho, dataset, learning_rate }
+        con "engine": "numpy" además: {
+            layers: [n_entrada, ocultas..., n_salida], weights: [W0, W1, ...],
+            X, Y (alternativa columnar a dataset), epochs, batch_size (None = lote
+            completo), shuffle, seed, bias, activation (capas ocultas),
+            record_steps: "none" | "epoch" | "batch"
+        }
+        con "inits": [{w_ih, w_ho} | {weights}, ...] o "n_runs": int, y
+        "learning_rates": [...], se entrenan todas las combinaciones a la vez
+        ("loss_every": épocas entre puntos de la curva de pérdida)
     :param verbosity: "first"|"all"|"final"
+    :param on_step: callback opcional que recibe cada paso en cuanto se
+        produce; en ese caso los pasos no se acumulan en el resultado
     """
-    raw = _run_nn(params)
+    engine = params.get("engine", ENGINE_DEFAULT)
+    if any(key in params for key in ("inits", "n_runs", "learning_rates")):
+        raw = _run_nn_batched(params)
+    elif engine == "numpy":
+        raw = _run_nn_numpy(params, on_step)
+    elif engine == "manual":
+        raw = _run_nn(params, on_step)
+    else:
+        raise ValueError("'engine' debe ser 'manual' o 'numpy'.")
     steps = raw["steps"]
 
     # Seleccionamos los pasos según verbosity
@@ -110,6 +378,10 @@ def run_nn_manual(params: Dict[str, Any], verbosity: str) -> Dict[str, Any]:
         "steps": selected_steps,
         "final_weights": raw["final_weights"],
     }
+    if "metrics" in raw:
+        final_payload["metrics"] = raw["metrics"]
+    if "runs" in raw:
+        final_payload["runs"] = raw["runs"]
 
     return {
         "history": [],
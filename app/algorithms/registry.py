@@ -0,0 +1,103 @@
+import importlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+# Registro de algoritmos con carga perezosa.
+#
+# Ningún módulo de app/algorithms se importa al arrancar: TensorFlow + el
+# modelo Keras (vision) y transformers + BERT (ner) se cargan la primera vez
+# que se usan, o en segundo plano al arrancar para los algoritmos listados en
+# ALGORITHMS_EAGER (p. ej. "vision,ner"). Tras la carga se ejecuta, si existe,
+# la función `warmup()` del módulo (una inferencia de prueba para trazar el
+# grafo) salvo que ALGORITHMS_WARMUP=0. El estado se consulta en /health.
+
+ALGORITHMS: Dict[str, Dict[str, str]] = {
+    "genetic": {"module": "app.algorithms.genetic", "runner": "run_genetic", "input": "params"},
+    "nb":      {"module": "app.algorithms.nb", "runner": "run_naive_bayes", "input": "params"},
+    "nn":      {"module": "app.algorithms.nn", "runner": "run_nn_manual", "input": "params"},
+    "vision":  {"module": "app.algorithms.vision", "runner": "run_vision_image_async", "input": "file"},
+    "ner":     {"module": "app.algorithms.ner", "runner": "run_ner_text", "input": "text"},
+}
+EAGER = [key.strip() for key in os.getenv("ALGORITHMS_EAGER", "").split(",") if key.strip()]
+WARMUP = os.getenv("ALGORITHMS_WARMUP", "1") != "0"
+
+_key_locks: Dict[str, threading.Lock] = {key: threading.Lock() for key in ALGORITHMS}
+_status: Dict[str, Dict[str, Any]] = {
+    key: {"state": "unloaded", "load_seconds": None, "warmup_seconds": None, "error": None}
+    for key in ALGORITHMS
+}
+
+
+def spec(algorithm_key: str) -> Dict[str, str]:
+    if algorithm_key not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm key: {algorithm_key}")
+    return ALGORITHMS[algorithm_key]
+
+
+def load(algorithm_key: str, warmup: bool = False) -> Any:
+    """
+    Importa el módulo del algoritmo (una sola vez, aunque lo pidan varios
+    hilos a la vez) y opcionalmente ejecuta su `warmup()`.
+    """
+    entry = spec(algorithm_key)
+    status = _status[algorithm_key]
+    with _key_locks[algorithm_key]:
+        if status["state"] == "ready":
+            return importlib.import_module(entry["module"])
+        status["state"] = "loading"
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(entry["module"])
+        except Exception as e:
+            status.update(state="error", error=f"{type(e).__name__}: {e}")
+            raise
+        status.update(load_seconds=round(time.perf_counter() - start, 3), error=None)
+
+        if warmup and hasattr(module, "warmup"):
+            status["state"] = "warming"
+            start = time.perf_counter()
+            try:
+                module.warmup()
+                status["warmup_seconds"] = round(time.perf_counter() - start, 3)
+            except Exception as e:
+                # Un fallo del warmup no impide usar el algoritmo
+                status["error"] = f"warmup: {type(e).__name__}: {e}"
+        status["state"] = "ready"
+        return module
+
+
+def get_runner(algorithm_key: str) -> Callable[..., Any]:
+    """Función de ejecución del algoritmo (importa su módulo si hace falta)."""
+    return getattr(load(algorithm_key), spec(algorithm_key)["runner"])
+
+
+def start_eager_loading() -> None:
+    """
+    Carga y calienta en segundo plano los algoritmos de ALGORITHMS_EAGER.
+    Una clave desconocida es un error de configuración: se rechaza al
+    arrancar en lugar de dar /health por listo sin ese algoritmo.
+    """
+    unknown = [key for key in EAGER if key not in ALGORITHMS]
+    if unknown:
+        raise ValueError(f"ALGORITHMS_EAGER contiene algoritmos desconocidos: {unknown}; "
+                         f"válidos: {list(ALGORITHMS)}")
+    def worker(keys: List[str]) -> None:
+        for key in keys:
+            try:
+                load(key, warmup=WARMUP)
+            except Exception:
+                pass  # el error queda en el estado del algoritmo
+    if EAGER:
+        threading.Thread(target=worker, args=(EAGER,), name="algorithms-eager", daemon=True).start()
+
+
+def status() -> Dict[str, Any]:
+    """
+    Estado de cada algoritmo. `ready` es True cuando todos los algoritmos
+    de carga anticipada están listos.
+    """
+    algorithms = {key: dict(st) for key, st in _status.items()}
+    ready = all(algorithms[key]["state"] == "ready" for key in EAGER)
+    return {"ready": ready, "eager": EAGER, "algorithms": algorithms}
@@ -2,29 +2,202 @@ import tensorflow as tf
 import numpy as np
 from fastapi import UploadFile
 from PIL import Image
+import asyncio
 import io
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.upload_limit import VISION_MAX_UPLOAD_BYTES
 
 MODEL_PATH = "saved_models/flower_classifier_model.keras"
+TFLITE_MODEL_PATH = os.getenv("VISION_TFLITE_PATH", "saved_models/flower_classifier_model.tflite")
 CLASS_NAMES = ['daisy', 'dandelion', 'roses', 'sunflowers', 'tulips']
 
+# Micro-batching: las peticiones concurrentes se agrupan en un único forward
+# de hasta VISION_MAX_BATCH imágenes. Una imagen espera como mucho
+# VISION_MAX_WAIT_MS desde que entra en la cola a que se complete su lote.
+MAX_BATCH = int(os.getenv("VISION_MAX_BATCH", "32"))
+MAX_WAIT_MS = float(os.getenv("VISION_MAX_WAIT_MS", "5"))
+
+# Subidas: el límite se aplica sobre el cuerpo de la petición en
+# app.upload_limit; aquí se vuelve a comprobar al leer por bloques (p. ej.
+# para llamadas directas a run_vision_image)
+IMAGE_SIZE = (224, 224)
+MAX_UPLOAD_BYTES = VISION_MAX_UPLOAD_BYTES
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Backend de inferencia: "keras" (modelo original en float32) o "tflite"
+# (modelo convertido con app/scripts/convert_vision_tflite.py, normalmente
+# cuantizado a int8) con VISION_TFLITE_THREADS hilos del intérprete.
+BACKEND = os.getenv("VISION_BACKEND", "keras")
+TFLITE_THREADS = int(os.getenv("VISION_TFLITE_THREADS", str(os.cpu_count() or 1)))
+
+# El intérprete TFLite tiene forma fija y redimensionarlo reserva de nuevo
+# los tensores, así que hay uno por tamaño de lote en potencias de dos
+# (1, 2, 4, ... MAX_BATCH) y cada lote se rellena con ceros hasta su tamaño.
+TFLITE_BUCKETS = sorted({min(1 << i, MAX_BATCH) for i in range(MAX_BATCH.bit_length() + 1)})
+
+_interpreters: Dict[int, Dict[str, Any]] = {}
+_interpreter_lock = threading.Lock()
+
+def _get_interpreter(size: int) -> Dict[str, Any]:
+    entry = _interpreters.get(size)
+    if entry is None:
+        interpreter = tf.lite.Interpreter(model_path=TFLITE_MODEL_PATH, num_threads=TFLITE_THREADS)
+        input_detail = interpreter.get_input_details()[0]
+        interpreter.resize_tensor_input(input_detail["index"], (size, *IMAGE_SIZE, 3))
+        interpreter.allocate_tensors()
+        input_detail = interpreter.get_input_details()[0]
+        entry = _interpreters[size] = {
+            "interpreter": interpreter,
+            "input": input_detail,
+            "output": interpreter.get_output_details()[0],
+            "buffer": np.zeros((size, *IMAGE_SIZE, 3), dtype=input_detail["dtype"]),
+        }
+    return entry
+
 # Carga el modelo solo una vez
-model = tf.keras.models.load_model(MODEL_PATH)
+model = None
+if BACKEND == "keras":
+    model = tf.keras.models.load_model(MODEL_PATH)
+elif BACKEND == "tflite":
+    _get_interpreter(1)
+else:
+    raise ValueError(f"VISION_BACKEND desconocido: {BACKEND} (usa 'keras' o 'tflite')")
 
-def preprocess_image(image_bytes) -> np.ndarray:
-    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    image = image.resize((224, 224))
-    img_array = tf.keras.utils.img_to_array(image)
-    img_array = tf.expand_dims(img_array, 0)
-    return img_array / 255.0
+def _quantize(x: np.ndarray, detail: Dict[str, Any]) -> np.ndarray:
+    # Entrada int8/uint8 de un modelo totalmente cuantizado: x / scale + zero_point
+    scale, zero_point = detail["quantization"]
+    info = np.iinfo(detail["dtype"])
+    return np.clip(np.round(x / scale + zero_point), info.min, info.max).astype(detail["dtype"])
 
-def run_vision_image(file: UploadFile) -> dict:
-    image_bytes = file.file.read()
-    processed_image = preprocess_image(image_bytes)
+def _predict_tflite(images: np.ndarray) -> np.ndarray:
+    n = len(images)
+    size = next(size for size in TFLITE_BUCKETS if size >= n)
+    with _interpreter_lock:
+        entry = _get_interpreter(size)
+        interpreter, input_detail, output_detail = entry["interpreter"], entry["input"], entry["output"]
+        buffer = entry["buffer"]
+        buffer[:n] = images if input_detail["dtype"] == np.float32 else _quantize(images, input_detail)
+        buffer[n:] = 0
+        interpreter.set_tensor(input_detail["index"], buffer)
+        interpreter.invoke()
+        predictions = interpreter.get_tensor(output_detail["index"])[:n]
+    if output_detail["dtype"] != np.float32:
+        scale, zero_point = output_detail["quantization"]
+        predictions = (predictions.astype(np.float32) - zero_point) * scale
+    return predictions
+
+def _predict(images: np.ndarray) -> np.ndarray:
+    """Forward de un lote (n×224×224×3, float32 en [0, 1]) con el backend configurado."""
+    if BACKEND == "tflite":
+        return _predict_tflite(images)
+    return np.asarray(model(images, training=False))
+
+def _check_upload_size(size: int) -> None:
+    if size > MAX_UPLOAD_BYTES:
+        raise ValueError(f"La imagen supera el tamaño máximo de {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+
+def read_upload(file: UploadFile) -> bytes:
+    """Lee la subida por bloques, sin pasar de MAX_UPLOAD_BYTES."""
+    buffer = bytearray()
+    while chunk := file.file.read(UPLOAD_CHUNK_BYTES):
+        buffer += chunk
+        _check_upload_size(len(buffer))
+    return bytes(buffer)
 
-    predictions = model.predict(processed_image)
-    predicted_index = np.argmax(predictions[0])
+async def read_upload_async(file: UploadFile) -> bytes:
+    buffer = bytearray()
+    while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+        buffer += chunk
+        _check_upload_size(len(buffer))
+    return bytes(buffer)
+
+def preprocess_image(image_bytes: bytes, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Decodifica la imagen y la deja en un buffer float32 contiguo de
+    224×224×3 escalado a [0, 1] (en `out` si se pasa).
+
+    En JPEG, `draft` decodifica directamente a escala reducida (1/2, 1/4 o
+    1/8, sin bajar de 224×224): una foto de 12 MP se decodifica a ~1.5 MP o
+    menos en lugar de a resolución completa antes de redimensionar.
+    """
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        if image.format == "JPEG":
+            image.draft("RGB", IMAGE_SIZE)
+        image = image.convert("RGB").resize(IMAGE_SIZE)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"No se pudo decodificar la imagen: {e}")
+    if out is None:
+        out = np.empty((*IMAGE_SIZE, 3), dtype=np.float32)
+    np.multiply(np.asarray(image, dtype=np.uint8), np.float32(1 / 255), out=out, casting="unsafe")
+    return out
+
+def _timed_preprocess(image_bytes: bytes) -> Tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    image = preprocess_image(image_bytes)
+    return image, round((time.perf_counter() - start) * 1000, 3)
+
+_batch_queue: "queue.Queue[Tuple[np.ndarray, float, Future]]" = queue.Queue()
+_batch_thread: Optional[threading.Thread] = None
+_batch_lock = threading.Lock()
+
+def _collect_batch() -> List[Tuple[np.ndarray, float, Future]]:
+    """Espera la primera imagen y añade las que lleguen hasta llenar el lote o agotar su espera."""
+    batch = [_batch_queue.get()]
+    deadline = batch[0][1] + MAX_WAIT_MS / 1000
+    while len(batch) < MAX_BATCH:
+        timeout = deadline - time.perf_counter()
+        try:
+            batch.append(_batch_queue.get(timeout=timeout) if timeout > 0 else _batch_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+def _batch_worker() -> None:
+    # Buffer del lote reservado una vez: cada forward copia las imágenes en
+    # sus primeras filas en lugar de apilar un array nuevo
+    images = np.empty((MAX_BATCH, *IMAGE_SIZE, 3), dtype=np.float32)
+    while True:
+        batch = _collect_batch()
+        started = time.perf_counter()
+        try:
+            for i, (image, _, _) in enumerate(batch):
+                images[i] = image
+            predictions = _predict(images[:len(batch)])
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            continue
+        inference_ms = round((time.perf_counter() - started) * 1000, 3)
+        for i, (_, enqueued, future) in enumerate(batch):
+            future.set_result((predictions[i], {
+                "backend": BACKEND,
+                "batch_size": len(batch),
+                "queue_ms": round((started - enqueued) * 1000, 3),
+                "inference_ms": inference_ms,
+            }))
+
+def _submit(image: np.ndarray) -> Future:
+    """Encola una imagen preprocesada (224×224×3) y devuelve el futuro de su predicción."""
+    global _batch_thread
+    with _batch_lock:
+        if _batch_thread is None:
+            _batch_thread = threading.Thread(target=_batch_worker, name="vision-batcher", daemon=True)
+            _batch_thread.start()
+    future: Future = Future()
+    _batch_queue.put((image, time.perf_counter(), future))
+    return future
+
+def _vision_result(predictions: np.ndarray, batch_info: Dict[str, Any]) -> dict:
+    predicted_index = np.argmax(predictions)
     predicted_class = CLASS_NAMES[predicted_index]
-    confidence = float(predictions[0][predicted_index])
+    confidence = float(predictions[predicted_index])
 
     return {
         "history": [
@@ -42,6 +215,32 @@ def run_vision_image(file: UploadFile) -> dict:
         "final": {
             "type": "vision",
             "prediction": predicted_class,
-            "confidence": round(confidence, 4)
+            "confidence": round(confidence, 4),
+            **batch_info
         }
     }
+
+def warmup() -> None:
+    """
+    Inferencia de prueba para que TensorFlow trace el grafo antes de la
+    primera petición (en TFLite, una por tamaño de lote).
+    """
+    for size in (TFLITE_BUCKETS if BACKEND == "tflite" else [1]):
+        _predict(np.zeros((size, *IMAGE_SIZE, 3), dtype=np.float32))
+
+def run_vision_image(file: UploadFile) -> dict:
+    """Clasifica la imagen a través del micro-batcher (bloquea hasta tener el resultado)."""
+    processed_image, preprocess_ms = _timed_preprocess(read_upload(file))
+    predictions, batch_info = _submit(processed_image).result()
+    return _vision_result(predictions, {"preprocess_ms": preprocess_ms, **batch_info})
+
+async def run_vision_image_async(file: UploadFile) -> dict:
+    """
+    Igual que `run_vision_image` sin bloquear el event loop: el preprocesado
+    va a un hilo y la predicción se espera como futuro del micro-batcher, así
+    las peticiones concurrentes llegan a compartir lote.
+    """
+    image_bytes = await read_upload_async(file)
+    processed_image, preprocess_ms = await asyncio.to_thread(_timed_preprocess, image_bytes)
+    predictions, batch_info = await asyncio.wrap_future(_submit(processed_image))
+    return _vision_result(predictions, {"preprocess_ms": preprocess_ms, **batch_info})
@@ -0,0 +1,166 @@
+import csv
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# Límite de memoria de la caché de instancias (matrices de distancias + vecinos)
+INSTANCE_CACHE_BYTES = int(os.getenv("VRP_INSTANCE_CACHE_BYTES", str(512 * 1024 * 1024)))
+NEIGHBORS_DEFAULT = 20
+
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def build_distance_matrix(destinations: Dict[int, Any]) -> Tuple[List[int], np.ndarray, np.ndarray]:
+    """
+    Precalcula la matriz de distancias depósito+clientes.
+
+    :return: (ids, dist, demand) donde el índice 0 es el depósito (0, 0) y el
+             índice i (1..n) corresponde al cliente ids[i-1].
+    """
+    ids = list(destinations.keys())
+    coords = np.zeros((len(ids) + 1, 2), dtype=np.float64)
+    demand = np.zeros(len(ids) + 1, dtype=np.float64)
+    for i, node in enumerate(ids, start=1):
+        x, y, d = destinations[node][:3]
+        coords[i] = (x, y)
+        demand[i] = d
+    diff = coords[:, None, :] - coords[None, :, :]
+    dist = np.sqrt((diff ** 2).sum(axis=-1))
+    return ids, dist, demand
+
+
+def parse_customers(customers: List[Any], depot: Optional[List[float]] = None) -> Dict[int, Tuple[float, float, float]]:
+    """
+    Convierte la lista de clientes recibida en `params` al formato de
+    DESTINATIONS: {id: (x, y, demanda)}.
+
+    Cada cliente puede ser {"id", "x", "y", "demand"} (id opcional) o
+    [x, y, demand]. Las coordenadas se trasladan para que el depósito quede
+    en (0, 0), que es lo que asumen los motores.
+    """
+    if not customers:
+        raise ValueError("La instancia VRP debe tener al menos un cliente.")
+    dx, dy = (float(depot[0]), float(depot[1])) if depot else (0.0, 0.0)
+
+    destinations: Dict[int, Tuple[float, float, float]] = {}
+    for pos, c in enumerate(customers, start=1):
+        try:
+            if isinstance(c, dict):
+                node = int(c.get("id", pos))
+                x, y, d = float(c["x"]), float(c["y"]), float(c["demand"])
+            else:
+                node = pos
+                x, y, d = (float(v) for v in c[:3])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Cliente {pos} inválido: se esperan x, y y demand.")
+        if node in destinations:
+            raise ValueError(f"Cliente con id duplicado: {node}")
+        if d < 0:
+            raise ValueError(f"La demanda del cliente {node} no puede ser negativa.")
+        destinations[node] = (x - dx, y - dy, d)
+    return destinations
+
+
+def check_capacity(destinations: Dict[int, Any], vehicle_capacity: float, num_vehicles: int) -> None:
+    """
+    Descarta instancias sin solución factible: un cliente con más demanda que
+    la capacidad de un vehículo o una demanda total mayor que la de la flota.
+    """
+    for node, v in destinations.items():
+        if v[2] > vehicle_capacity:
+            raise ValueError(
+                f"La demanda del cliente {node} ({v[2]:g}) supera la capacidad del vehículo ({vehicle_capacity:g})."
+            )
+    total = sum(v[2] for v in destinations.values())
+    if total > vehicle_capacity * num_vehicles:
+        raise ValueError(
+            f"La demanda total ({total:g}) supera la capacidad de la flota "
+            f"({num_vehicles} vehículos × {vehicle_capacity:g})."
+        )
+
+
+def load_instance_file(path: str) -> Dict[str, Any]:
+    """
+    Lee un fichero de instancia subido (JSON o CSV) y devuelve
+    {"customers": [...], "depot": [x, y] | None}.
+
+    - JSON: {"customers": [...], "depot": [x, y]} o directamente la lista.
+    - CSV: columnas x, y, demand (id opcional).
+    """
+    if not os.path.isfile(path):
+        raise ValueError(f"No se encontró el fichero de instancia: {path}")
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            return {"customers": data, "depot": None}
+        return {"customers": data.get("customers", []), "depot": data.get("depot")}
+
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    return {"customers": rows, "depot": None}
+
+
+def instance_key(destinations: Dict[int, Any]) -> str:
+    """Hash de contenido de la instancia (independiente del orden de los clientes)."""
+    canonical = json.dumps(sorted([node, *map(float, v[:3])] for node, v in destinations.items()))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _build_instance(key: str, destinations: Dict[int, Any], n_neighbors: int) -> Dict[str, Any]:
+    ids, dist, demand = build_distance_matrix(destinations)
+    n = len(ids)
+
+    # Vecinos más cercanos de cada cliente (índices 1..n, sin el depósito)
+    k = min(n_neighbors, n - 1)
+    neighbors = np.zeros((n + 1, max(k, 0)), dtype=np.int32)
+    if k > 0:
+        d = dist[1:, 1:].copy()
+        np.fill_diagonal(d, np.inf)
+        nearest = np.argpartition(d, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(d, nearest, axis=1).argsort(axis=1)
+        neighbors[1:] = np.take_along_axis(nearest, order, axis=1) + 1
+
+    return {
+        "key": key,
+        "destinations": destinations,
+        "ids": ids,
+        "dist": dist,
+        "demand": demand,
+        "neighbors": neighbors,
+        "nbytes": dist.nbytes + demand.nbytes + neighbors.nbytes,
+    }
+
+
+def get_instance(destinations: Dict[int, Any], key: Optional[str] = None,
+                 n_neighbors: int = NEIGHBORS_DEFAULT) -> Dict[str, Any]:
+    """
+    Devuelve la instancia (matriz de distancias y listas de vecinos) desde la
+    caché LRU del proceso, construyéndola sólo la primera vez. Se expulsan las
+    instancias menos usadas cuando se supera INSTANCE_CACHE_BYTES.
+    """
+    global _cache_bytes
+    key = key or instance_key(destinations)
+    with _cache_lock:
+        instance = _cache.get(key)
+        if instance is not None:
+            _cache.move_to_end(key)
+            return instance
+
+    instance = _build_instance(key, destinations, n_neighbors)
+
+    with _cache_lock:
+        if key not in _cache:
+            _cache[key] = instance
+            _cache_bytes += instance["nbytes"]
+            while _cache_bytes > INSTANCE_CACHE_BYTES and len(_cache) > 1:
+                _, evicted = _cache.popitem(last=False)
+                _cache_bytes -= evicted["nbytes"]
+        return _cache[key]
@@ -0,0 +1,88 @@
+import random
+from typing import List
+
+import numpy as np
+
+# Búsqueda local para el paso memético del algoritmo genético.
+#
+# Trabaja sobre rutas de índices de la matriz de distancias (0 = depósito) y
+# evalúa cada movimiento en O(1) con la matriz, sin recalcular la ruta entera.
+# Los candidatos se limitan a las listas de vecinos más cercanos de la
+# instancia (vecindario granular).
+
+
+def improve_routes(routes: List[List[int]], dist: np.ndarray, demand: np.ndarray, vehicle_capacity: float,
+                   neighbors: np.ndarray, max_moves: int, rng: random.Random = random) -> List[List[int]]:
+    """
+    Aplica movimientos 2-opt (intra-ruta) y relocate (entre rutas o dentro de
+    la misma) con criterio de primera mejora.
+
+    :param routes: rutas con índices 1..n; se devuelven nuevas listas
+    :param neighbors: neighbors[u] = clientes más cercanos a u
+    :param max_moves: número máximo de movimientos evaluados
+    :return: rutas mejoradas (mismo número de rutas)
+    """
+    routes = [list(r) for r in routes]
+    loads = [float(demand[r].sum()) if r else 0.0 for r in routes]
+    where = {}
+    for ri, r in enumerate(routes):
+        for pos, u in enumerate(r):
+            where[u] = (ri, pos)
+
+    def reindex(ri):
+        for pos, u in enumerate(routes[ri]):
+            where[u] = (ri, pos)
+
+    def prev_of(ri, pos):
+        return routes[ri][pos - 1] if pos > 0 else 0
+
+    def next_of(ri, pos):
+        r = routes[ri]
+        return r[pos + 1] if pos + 1 < len(r) else 0
+
+    d = dist
+    customers = list(where)
+    tried = 0
+    improved = True
+    while improved and tried < max_moves:
+        improved = False
+        rng.shuffle(customers)
+        for u in customers:
+            for v in neighbors[u].tolist():
+                if tried >= max_moves:
+                    return routes
+                tried += 1
+                ru, pu = where[u]
+                rv, pv = where[v]
+                p, nx = prev_of(ru, pu), next_of(ru, pu)
+                removal = d[p, u] + d[u, nx] - d[p, nx]
+
+                # Relocate: u justo después de v
+                if (ru != rv or (pv != pu - 1)) and (ru == rv or loads[rv] + demand[u] <= vehicle_capacity):
+                    w = next_of(rv, pv)
+                    insertion = d[v, u] + d[u, w] - d[v, w]
+                    if insertion - removal < -1e-9:
+                        routes[ru].pop(pu)
+                        if ru == rv and pv > pu:
+                            pv -= 1
+                        routes[rv].insert(pv + 1, u)
+                        loads[ru] -= demand[u]
+                        loads[rv] += demand[u]
+                        reindex(ru)
+                        if rv != ru:
+                            reindex(rv)
+                        improved = True
+                        continue
+
+                # 2-opt dentro de la ruta: crear la arista (u, v)
+                if ru == rv:
+                    i, j = (pu, pv) if pu < pv else (pv, pu)
+                    a, b = routes[ru][i], routes[ru][i + 1]
+                    c, e = routes[ru][j], next_of(ru, j)
+                    if b != c:
+                        delta = d[a, c] + d[b, e] - d[a, b] - d[c, e]
+                        if delta < -1e-9:
+                            routes[ru][i + 1:j + 1] = routes[ru][i + 1:j + 1][::-1]
+                            reindex(ru)
+                            improved = True
+    return routes
@@ -3,10 +3,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 
-from app.routes import projects, files, execute
+from app.algorithms import registry
+from app.upload_limit import UploadLimitMiddleware
+from app.routes import projects, files, execute, predict, health
 
 app = FastAPI()
 
+# Se añade antes que CORS para que los 413 también lleven sus cabeceras
+app.add_middleware(UploadLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -20,3 +25,12 @@ app.mount("/data", StaticFiles(directory="/data"), name="data")
 app.include_router(projects.router, prefix="/projects", tags=["projects"])
 app.include_router(files.router, prefix="/files", tags=["files"])
 app.include_router(execute.router, prefix="/execute", tags=["execute"])
+app.include_router(predict.router, prefix="/predict", tags=["predict"])
+app.include_router(health.router, prefix="/health", tags=["health"])
+
+
+@app.on_event("startup")
+def load_algorithms() -> None:
+    # Los modelos pesados se cargan en segundo plano: el servidor acepta
+    # peticiones enseguida y /health indica cuándo están listos
+    registry.start_eager_loading()
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, func
+from app.db import Base
+
+class EliteSolution(Base):
+    __tablename__ = "elite_solutions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    instance_key = Column(String, nullable=False, index=True)   # hash de contenido de la instancia VRP
+    num_vehicles = Column(Integer, nullable=False)
+    vehicle_capacity = Column(Float, nullable=False)
+    routes = Column(JSON, nullable=False)                       # [[id, ...], ...]
+    routes_used = Column(Integer, nullable=False)
+    total_distance = Column(Float, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
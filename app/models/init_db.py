@@ -7,6 +7,7 @@ from sqlalchemy import select
 from app.db import Base, engine, SessionLocal
 from app.models.project import Project
 from app.models.file import FileMeta
+from app.models.elite_solution import EliteSolution  # noqa: F401 (registra la tabla)
 
 async def seed_data():
     async with SessionLocal() as session:  # AsyncSession
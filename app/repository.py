@@ -1,11 +1,20 @@
 import os
-from typing import List, Optional
+import time
+import logging
+import asyncio
+import itertools
+import queue
+from multiprocessing import get_context
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import SessionLocal
+from app import scheduler
 from app.models.project import Project
 from app.models.file import FileMeta
+from app.models.elite_solution import EliteSolution
 from app.schemas.project import ProjectOut
 from app.schemas.file import FileMetaOut
 from app.schemas.execute import (
@@ -13,18 +22,40 @@ from app.schemas.execute import (
     ExecuteResult,
     EpochStats,
     FirstEpochOut,
+    SweepRequest,
+    SweepRow,
+    PredictNBRequest,
+    PredictNBResult,
+    OnlineNBCreate,
+    OnlineNBUpdate,
+    OnlineNBVersion,
 )
 
-# Funciones de algoritmos
-from app.algorithms.genetic import run_genetic
-from app.algorithms.nb import run_naive_bayes
-from app.algorithms.nn import run_nn_manual
-from app.algorithms.vision import run_vision_image
-from app.algorithms.ner import run_ner_text  # ✅ NUEVO
+# Funciones de algoritmos: se importan bajo demanda desde el registro (ver
+# app.algorithms.registry) para no cargar TensorFlow/transformers al arrancar
+from app.algorithms import registry
+from app.algorithms.vrp_instance import load_instance_file
 
 from fastapi import UploadFile
 import json
 
+logger = logging.getLogger(__name__)
+
+# Tamaño máximo del pool de élites por (instancia, vehículos, capacidad)
+ELITE_POOL_SIZE = int(os.getenv("GA_ELITE_POOL_SIZE", "20"))
+# Fallos de la base de datos que no deben tumbar una ejecución: errores de
+# SQLAlchemy y de conexión del driver (conexión rechazada, DNS, timeout)
+ELITE_POOL_ERRORS = (SQLAlchemyError, OSError, asyncio.TimeoutError)
+
+# Barridos de parámetros
+SWEEP_MAX_CONFIGS = int(os.getenv("SWEEP_MAX_CONFIGS", "1000"))
+# Streaming de progreso: eventos en cola entre el hilo de cálculo y la respuesta
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "256"))
+STREAM_POLL_SECONDS = 0.1
+STREAM_ALGORITHMS = ("genetic", "nn")
+
+SWEEP_ALGORITHMS = ("genetic", "nb", "nn")
+
 async def get_projects() -> List[ProjectOut]:
     async with SessionLocal() as session:
         result = await session.execute(select(Project))
@@ -65,6 +96,90 @@ async def get_file(file_id: str) -> FileMetaOut:
         raise ValueError(f"File with id '{file_id}' not found")
     return FileMetaOut.from_orm(file_obj)
 
+async def get_elite_solutions(instance_key: str, num_vehicles: int, vehicle_capacity: float,
+                              limit: int = ELITE_POOL_SIZE) -> List[List[List[int]]]:
+    """Devuelve las mejores soluciones guardadas (rutas con ids), de mejor a peor."""
+    async with SessionLocal() as session:
+        result = await session.execute(
+            select(EliteSolution)
+            .where(
+                EliteSolution.instance_key == instance_key,
+                EliteSolution.num_vehicles == num_vehicles,
+                EliteSolution.vehicle_capacity == vehicle_capacity,
+            )
+            .order_by(EliteSolution.total_distance)
+            .limit(limit)
+        )
+        return [sol.routes for sol in result.scalars().all()]
+
+async def save_elite_solution(instance_key: str, num_vehicles: int, vehicle_capacity: float,
+                              routes: List[List[int]], total_distance: float) -> None:
+    """
+    Añade una solución al pool de élites. Se ignoran duplicados (mismas rutas
+    en cualquier orden) y, si el pool supera ELITE_POOL_SIZE, se expulsan las
+    soluciones dominadas (las de mayor distancia).
+    """
+    def canonical(rs):
+        return sorted(tuple(r) for r in rs if r)
+
+    async with SessionLocal() as session:
+        result = await session.execute(
+            select(EliteSolution).where(
+                EliteSolution.instance_key == instance_key,
+                EliteSolution.num_vehicles == num_vehicles,
+                EliteSolution.vehicle_capacity == vehicle_capacity,
+            )
+        )
+        pool = list(result.scalars().all())
+        if any(canonical(sol.routes) == canonical(routes) for sol in pool):
+            return
+
+        new = EliteSolution(
+            instance_key=instance_key,
+            num_vehicles=num_vehicles,
+            vehicle_capacity=vehicle_capacity,
+            routes=routes,
+            routes_used=len([r for r in routes if r]),
+            total_distance=total_distance,
+        )
+        ranked = sorted(pool + [new], key=lambda sol: (sol.total_distance, sol.routes_used))
+        if new not in ranked[:ELITE_POOL_SIZE]:
+            return
+        session.add(new)
+        for sol in ranked[ELITE_POOL_SIZE:]:
+            await session.delete(sol)
+        await session.commit()
+
+async def _prepare_genetic(params: Dict[str, Any]) -> None:
+    """
+    Resuelve la instancia subida (`instance_file_id`) y, con `warm_start`,
+    siembra la población desde el pool de élites. Si la base de datos no
+    responde, la ejecución arranca sin semillas.
+    """
+    instance_file_id = params.pop("instance_file_id", None)
+    if instance_file_id is not None:
+        file_meta = await get_file(instance_file_id)
+        params.update(load_instance_file(file_meta.path))
+
+    if params.get("warm_start"):
+        genetic = await asyncio.to_thread(registry.load, "genetic")
+        try:
+            params["seed_solutions"] = await get_elite_solutions(*genetic.elite_pool_key(params))
+        except ELITE_POOL_ERRORS as e:
+            logger.warning("No se pudo leer el pool de élites: %s", e)
+
+async def _finish_genetic(params: Dict[str, Any], raw: Dict[str, Any]) -> None:
+    # La mejor solución factible entra en el pool de élites de la instancia.
+    # Es best-effort: un fallo de la base de datos no invalida la ejecución
+    best = raw["final"]
+    genetic = await asyncio.to_thread(registry.load, "genetic")
+    if not genetic.is_feasible(params, best["best_solution"]):
+        return
+    try:
+        await save_elite_solution(*genetic.elite_pool_key(params), best["best_solution"], best["total_distance"])
+    except ELITE_POOL_ERRORS as e:
+        logger.warning("No se pudo guardar la solución en el pool de élites: %s", e)
+
 # 🚨 Ejecuta el algoritmo correspondiente
 async def execute_algorithm(
     algorithm_key: str,
@@ -72,32 +187,250 @@ async def execute_algorithm(
     file: Optional[UploadFile] = None
 ) -> ExecuteResult:
     """
-    Ejecuta el algoritmo correspondiente según `algorithm_key`.
+    Ejecuta el algoritmo correspondiente según `algorithm_key`. El cálculo
+    va al pool de su algoritmo (ver app.scheduler), que lanza SchedulerBusy
+    si está saturado.
     """
-    if algorithm_key == "genetic":
-        params = ExecuteParams(**json.loads(params_json))
-        raw = run_genetic(params.params, params.verbosity)
-
-    elif algorithm_key == "nb":
-        params = ExecuteParams(**json.loads(params_json))
-        raw = run_naive_bayes(params.params, params.verbosity)
-
-    elif algorithm_key == "nn":
-        params = ExecuteParams(**json.loads(params_json))
-        raw = run_nn_manual(params.params, params.verbosity)
-
-    elif algorithm_key == "vision":
+    spec = registry.spec(algorithm_key)
+    if spec["input"] == "file":
         if not file:
             raise ValueError("Se requiere un archivo de imagen para el algoritmo de visión.")
-        raw = run_vision_image(file)
-
-    elif algorithm_key == "ner":
+        args = (file,)
+    elif spec["input"] == "text":
         if not params_json:
             raise ValueError("Se requiere texto como entrada para NER.")
         params = ExecuteParams(**json.loads(params_json))
-        raw = run_ner_text(params.params["text"], params.verbosity)
-
+        args = (params.params["text"], params.verbosity)
     else:
-        raise ValueError(f"Unknown algorithm key: {algorithm_key}")
+        params = ExecuteParams(**json.loads(params_json))
+        args = (params.params, params.verbosity)
+
+    # Primera llamada: importa el módulo (y su modelo) fuera del event loop
+    runner = await asyncio.to_thread(registry.get_runner, algorithm_key)
+
+    if algorithm_key == "genetic":
+        await _prepare_genetic(params.params)
+    raw = await scheduler.run(algorithm_key, runner, *args)
+    if algorithm_key == "genetic":
+        await _finish_genetic(params.params, raw)
 
     return ExecuteResult(**raw)
+
+
+# 📡 Ejecución con progreso en streaming
+class _StreamCancelled(Exception):
+    """El cliente cerró la conexión: se aborta el cálculo en curso."""
+
+_stream_manager = None
+
+def _get_stream_manager():
+    # Las colas y eventos de streaming cruzan procesos (el cálculo corre en el
+    # pool del planificador), así que se crean a través de un Manager
+    global _stream_manager
+    if _stream_manager is None:
+        _stream_manager = get_context("forkserver").Manager()
+    return _stream_manager
+
+def _stream_work(algorithm_key: str, params: Dict[str, Any], verbosity: str, events, cancelled) -> Dict[str, Any]:
+    # Se ejecuta en un proceso del pool del algoritmo; cada evento se publica
+    # en la cola compartida (acotada: si el cliente lee despacio, se espera,
+    # comprobando entre tanto si el cliente se ha ido)
+    def emit(event: str, data: Dict[str, Any]) -> None:
+        while not cancelled.is_set():
+            try:
+                events.put((event, data), timeout=STREAM_POLL_SECONDS)
+                return
+            except queue.Full:
+                pass
+        raise _StreamCancelled()
+
+    runner = registry.get_runner(algorithm_key)
+    if algorithm_key == "genetic":
+        return runner(params, verbosity, on_epoch=lambda e: emit("epoch", e))
+    return runner(params, verbosity, on_step=lambda s: emit("step", s))
+
+def _next_event(events, timeout: Optional[float]) -> Optional[Tuple[str, Any]]:
+    try:
+        return events.get(timeout=timeout) if timeout else events.get_nowait()
+    except queue.Empty:
+        return None
+
+async def stream_algorithm(algorithm_key: str, params: ExecuteParams) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Ejecuta el algoritmo en el pool del planificador y va devolviendo eventos
+    (nombre, datos): "start", "epoch" (genético: {gen, best, avg}), "step"
+    (nn), y al final "final" con el ExecuteResult (sin historial) o "error".
+
+    La cola entre el cálculo y la respuesta está acotada: si el cliente lee
+    despacio, el cálculo espera en lugar de acumular el historial en memoria.
+    """
+    if algorithm_key not in STREAM_ALGORITHMS:
+        raise ValueError(f"El algoritmo '{algorithm_key}' no admite streaming de progreso.")
+    # La plaza del planificador se ocupa durante toda la transmisión
+    async with scheduler.admit(algorithm_key):
+        async for event in _stream_events(algorithm_key, params):
+            yield event
+
+async def _stream_events(algorithm_key: str, params: ExecuteParams) -> AsyncIterator[Tuple[str, Any]]:
+    if algorithm_key == "genetic":
+        await _prepare_genetic(params.params)
+
+    manager = await asyncio.to_thread(_get_stream_manager)
+    events = manager.Queue(maxsize=STREAM_QUEUE_SIZE)
+    cancelled = manager.Event()
+    task = asyncio.ensure_future(scheduler.execute(
+        algorithm_key, _stream_work, algorithm_key, params.params, params.verbosity, events, cancelled
+    ))
+    try:
+        yield "start", {"algorithm_key": algorithm_key}
+        while True:
+            event = await asyncio.to_thread(_next_event, events, STREAM_POLL_SECONDS)
+            if event is not None:
+                yield event
+            elif task.done():
+                # El cálculo terminó: sus eventos ya están todos en la cola
+                while (event := await asyncio.to_thread(_next_event, events, None)) is not None:
+                    yield event
+                break
+
+        try:
+            raw = task.result()
+        except ValueError as e:
+            yield "error", {"detail": str(e)}
+            return
+        if algorithm_key == "genetic":
+            await _finish_genetic(params.params, raw)
+        yield "final", ExecuteResult(**raw)
+    finally:
+        # Cliente desconectado: el cálculo se detiene en su siguiente evento y
+        # el _StreamCancelled con el que termina se descarta. Sin await: el
+        # bloque puede ejecutarse dentro de una cancelación
+        if not task.done():
+            cancelled.set()
+            task.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
+# 📨 Clasificación con modelos NB registrados
+def list_nb_models() -> List[Dict[str, Any]]:
+    from app.algorithms import nb_registry
+    return nb_registry.list_models()
+
+def predict_nb(request: PredictNBRequest) -> PredictNBResult:
+    """Clasifica un lote de mensajes con un modelo ya entrenado (sin reentrenar)."""
+    from app.algorithms import nb_registry
+    start = time.perf_counter()
+    out = nb_registry.predict(request.model_id, request.messages, request.model)
+    return PredictNBResult(
+        model_id=request.model_id,
+        model=request.model,
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+        **out,
+    )
+
+def create_online_nb(request: OnlineNBCreate) -> OnlineNBVersion:
+    from app.algorithms import nb_online
+    return OnlineNBVersion(**nb_online.create_online_model(request.name, request.params))
+
+def update_online_nb(name: str, request: OnlineNBUpdate) -> OnlineNBVersion:
+    """Actualiza el modelo con mensajes recién etiquetados y publica una versión nueva."""
+    from app.algorithms import nb_online
+    return OnlineNBVersion(**nb_online.update_online_model(name, request.messages, request.labels))
+
+def list_online_nb_versions(name: str) -> List[OnlineNBVersion]:
+    from app.algorithms import nb_online
+    return [OnlineNBVersion(**meta) for meta in nb_online.list_versions(name)]
+
+def online_nb_metrics(name: str, version: Optional[int] = None) -> Dict[str, Any]:
+    from app.algorithms import nb_online
+    return nb_online.version_metrics(name, version)
+
+
+# 📊 Barridos de parámetros
+def _expand_sweep(request: SweepRequest) -> List[Dict[str, Any]]:
+    """Lista de parámetros: `configs` explícitas y/o el producto de `grid`, sobre `base`."""
+    configs = [{**request.base, **cfg} for cfg in request.configs]
+    if request.grid:
+        keys = list(request.grid)
+        for values in itertools.product(*(request.grid[k] for k in keys)):
+            configs.append({**request.base, **dict(zip(keys, values))})
+    if not configs:
+        configs = [dict(request.base)]
+    if len(configs) > SWEEP_MAX_CONFIGS:
+        raise ValueError(f"El barrido supera el máximo de {SWEEP_MAX_CONFIGS} configuraciones.")
+    return configs
+
+def _sweep_summary(algorithm_key: str, final: Dict[str, Any]) -> Dict[str, Any]:
+    """Columnas de la tabla comparativa para cada configuración."""
+    if algorithm_key == "genetic":
+        return {"total_distance": final["total_distance"]}
+    if algorithm_key == "nb":
+        return {
+            f"{model}.{metric}": value
+            for model, values in final["metrics"].items()
+            for metric, value in values.items()
+        }
+    if final.get("metrics"):
+        return {"loss": final["metrics"]["loss"], "accuracy": final["metrics"]["accuracy"]}
+    return {"final_weights": final["final_weights"]}
+
+def _run_sweep_config(algorithm_key: str, index: int, params: Dict[str, Any], verbosity: str) -> Dict[str, Any]:
+    # Se ejecuta en un proceso del pool del algoritmo
+    start = time.perf_counter()
+    row: Dict[str, Any] = {"index": index, "params": params}
+    try:
+        raw = registry.get_runner(algorithm_key)(dict(params), verbosity)
+        row["summary"] = _sweep_summary(algorithm_key, raw["final"])
+        row["result"] = raw
+    except Exception as e:
+        # Un valor inválido en la rejilla (p. ej. population_size: "x") sólo
+        # invalida su fila, no el barrido entero
+        row["error"] = str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"
+    row["elapsed_ms"] = (time.perf_counter() - start) * 1000
+    return row
+
+async def execute_sweep(algorithm_key: str, request: SweepRequest) -> AsyncIterator[SweepRow]:
+    """
+    Ejecuta en paralelo todas las configuraciones del barrido y va
+    devolviendo cada fila en cuanto termina su configuración.
+
+    El barrido ocupa una plaza del planificador (o se rechaza con
+    SchedulerBusy) y usa el pool del algoritmo con, como mucho, tantas
+    configuraciones a la vez como procesos tiene: las peticiones que lleguen
+    mientras tanto esperan detrás de esas, no detrás del barrido entero.
+    """
+    if algorithm_key not in SWEEP_ALGORITHMS:
+        raise ValueError(f"El algoritmo '{algorithm_key}' no admite barridos de parámetros.")
+    configs = _expand_sweep(request)
+    if any(cfg.get("warm_start") for cfg in configs):
+        # Las configuraciones deben ser comparables: sin semillas del pool de
+        # élites (que además cambia conforme terminan las ejecuciones)
+        raise ValueError("Los barridos no admiten 'warm_start'.")
+
+    # Preparación común: la instancia VRP subida se lee una sola vez
+    if algorithm_key == "genetic":
+        shared: Dict[str, Any] = {}
+        for cfg in configs:
+            file_id = cfg.pop("instance_file_id", None)
+            if file_id is not None:
+                if file_id not in shared:
+                    file_meta = await get_file(file_id)
+                    shared[file_id] = load_instance_file(file_meta.path)
+                cfg.update(shared[file_id])
+
+    async with scheduler.admit(algorithm_key):
+        window = asyncio.Semaphore(scheduler.workers(algorithm_key))
+
+        async def run_config(index: int, cfg: Dict[str, Any]) -> Dict[str, Any]:
+            async with window:
+                return await scheduler.execute(
+                    algorithm_key, _run_sweep_config, algorithm_key, index, cfg, request.verbosity
+                )
+
+        tasks = [asyncio.ensure_future(run_config(i, cfg)) for i, cfg in enumerate(configs)]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield SweepRow(**(await future))
+        finally:
+            # Cliente desconectado: las configuraciones pendientes no llegan a lanzarse
+            for task in tasks:
+                task.cancel()
@@ -1,11 +1,18 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from app.schemas.execute import ExecuteResult
-from app.repository import execute_algorithm
+from fastapi.responses import StreamingResponse
+from app.schemas.execute import ExecuteParams, ExecuteResult, SweepRequest, SweepResult
+from app.repository import execute_algorithm, execute_sweep, stream_algorithm
+from app.scheduler import SchedulerBusy
 
 import json
 
 router = APIRouter()
 
+
+def _too_busy(e: SchedulerBusy) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
 @router.post("/{algorithm_key}", response_model=ExecuteResult)
 async def run_algorithm(
     algorithm_key: str,
@@ -25,5 +32,68 @@ async def run_algorithm(
 
         result = await execute_algorithm(algorithm_key, params_json, file)
         return result
+    except SchedulerBusy as e:
+        raise _too_busy(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/{algorithm_key}/sweep", response_model=SweepResult)
+async def run_sweep(algorithm_key: str, request: SweepRequest):
+    """
+    Ejecuta un barrido de parámetros (rejilla o lista de configuraciones) en
+    paralelo y devuelve una tabla comparativa. Con `stream: true` se envía
+    una línea NDJSON por configuración en cuanto termina.
+    """
+    try:
+        rows = execute_sweep(algorithm_key, request)
+        if request.stream:
+            first = await anext(rows, None)
+
+            async def ndjson():
+                if first is not None:
+                    yield first.model_dump_json() + "\n"
+                async for row in rows:
+                    yield row.model_dump_json() + "\n"
+
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+        collected = [row async for row in rows]
+        collected.sort(key=lambda row: row.index)
+        return SweepResult(algorithm_key=algorithm_key, rows=collected)
+    except SchedulerBusy as e:
+        raise _too_busy(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _sse(event: str, data) -> str:
+    payload = data.model_dump_json() if hasattr(data, "model_dump_json") else json.dumps(data)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+@router.post("/{algorithm_key}/stream")
+async def run_algorithm_stream(algorithm_key: str, params: ExecuteParams):
+    """
+    Ejecuta el algoritmo genético o la red (nn) enviando el progreso como
+    server-sent events: `epoch` por generación, `step` por paso de la red y
+    `final` con el resultado (sin historial, que ya se envió por eventos).
+    """
+    try:
+        events = stream_algorithm(algorithm_key, params)
+        first = await anext(events)
+    except SchedulerBusy as e:
+        raise _too_busy(e)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+    async def sse():
+        yield _sse(*first)
+        async for event in events:
+            yield _sse(*event)
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from typing import Any, Dict
+
+from app import scheduler
+from app.algorithms import registry
+
+router = APIRouter()
+
+# 🩺 Estado del servicio: carga/calentamiento de cada algoritmo y ocupación de sus pools
+@router.get("")
+def health() -> Dict[str, Any]:
+    return {**registry.status(), "scheduler": scheduler.snapshot()}
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, HTTPException
+from typing import Any, Dict, List, Optional
+
+from app.repository import (
+    list_nb_models,
+    predict_nb,
+    create_online_nb,
+    update_online_nb,
+    list_online_nb_versions,
+    online_nb_metrics,
+)
+from app.schemas.execute import (
+    PredictNBRequest,
+    PredictNBResult,
+    OnlineNBCreate,
+    OnlineNBUpdate,
+    OnlineNBVersion,
+)
+
+router = APIRouter()
+
+
+@router.get("/nb/models", response_model=List[Dict[str, Any]])
+def list_models_nb():
+    """
+    Lista los modelos Naive Bayes del registro local (parámetros, métricas).
+    """
+    return list_nb_models()
+
+
+@router.post("/nb", response_model=PredictNBResult)
+def classify_nb(request: PredictNBRequest):
+    """
+    Clasifica un lote de mensajes SMS con un modelo registrado, en una sola
+    llamada vectorizada y sin reentrenar.
+    """
+    try:
+        return predict_nb(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/nb/online", response_model=OnlineNBVersion)
+def create_model_online(request: OnlineNBCreate):
+    """
+    Crea un modelo NB incremental (versión 1) a partir del CSV de entrenamiento.
+    """
+    try:
+        return create_online_nb(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/nb/online/{name}/labels", response_model=OnlineNBVersion)
+def append_labels_online(name: str, request: OnlineNBUpdate):
+    """
+    Añade mensajes etiquetados al modelo con partial_fit, sin reentrenar
+    desde el CSV, y devuelve la nueva versión.
+    """
+    try:
+        return update_online_nb(name, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/nb/online/{name}/versions", response_model=List[OnlineNBVersion])
+def list_versions_online(name: str):
+    """
+    Lista las versiones del modelo (las métricas sólo si ya se calcularon).
+    """
+    try:
+        return list_online_nb_versions(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/nb/online/{name}/metrics", response_model=Dict[str, Any])
+def metrics_online(name: str, version: Optional[int] = None):
+    """
+    Métricas de una versión (por defecto la última), calculadas bajo demanda.
+    """
+    try:
+        return online_nb_metrics(name, version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
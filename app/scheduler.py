@@ -0,0 +1,129 @@
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from multiprocessing import get_context
+from typing import Any, AsyncIterator, Callable, Dict
+
+# Planificador de ejecuciones: cada algoritmo tiene su propio pool acotado
+# (procesos para el cálculo en Python puro, hilos para los modelos que ya
+# liberan el GIL o que son caros de cargar en cada proceso) y un límite de
+# peticiones en cola. Al superarlo se rechaza enseguida con SchedulerBusy
+# (429 + Retry-After) en lugar de congelar el event loop.
+#
+# Límites configurables por variable de entorno, p. ej. EXEC_WORKERS_GENETIC
+# y EXEC_QUEUE_GENETIC.
+
+_CPUS = os.cpu_count() or 1
+DEFAULT_LIMITS: Dict[str, Dict[str, Any]] = {
+    "genetic": {"kind": "process", "workers": _CPUS, "queue": 2 * _CPUS},
+    "nb":      {"kind": "process", "workers": 2, "queue": 8},
+    "nn":      {"kind": "process", "workers": 2, "queue": 8},
+    "vision":  {"kind": "async", "workers": 64, "queue": 64},   # el micro-batcher agrupa
+    "ner":     {"kind": "thread", "workers": 2, "queue": 8},
+}
+FALLBACK_LIMITS = {"kind": "thread", "workers": 1, "queue": 4}
+DURATION_SMOOTHING = 0.2        # peso de la última duración en la media móvil
+
+
+class SchedulerBusy(Exception):
+    """El algoritmo tiene todas sus plazas (ejecución + cola) ocupadas."""
+
+    def __init__(self, algorithm_key: str, retry_after: int):
+        super().__init__(f"El algoritmo '{algorithm_key}' está saturado; reintenta en {retry_after} s.")
+        self.algorithm_key = algorithm_key
+        self.retry_after = retry_after
+
+
+_state: Dict[str, Dict[str, Any]] = {}
+
+
+def _get_state(algorithm_key: str) -> Dict[str, Any]:
+    st = _state.get(algorithm_key)
+    if st is None:
+        limits = dict(DEFAULT_LIMITS.get(algorithm_key, FALLBACK_LIMITS))
+        suffix = algorithm_key.upper()
+        limits["workers"] = int(os.getenv(f"EXEC_WORKERS_{suffix}", limits["workers"]))
+        limits["queue"] = int(os.getenv(f"EXEC_QUEUE_{suffix}", limits["queue"]))
+        st = _state[algorithm_key] = {
+            **limits,
+            "executor": None,
+            "in_flight": 0,
+            "avg_seconds": None,
+            "rejected": 0,
+        }
+    return st
+
+
+def _executor(st: Dict[str, Any]) -> Executor:
+    if st["executor"] is None:
+        if st["kind"] == "process":
+            # forkserver: no se hace fork de un proceso que ya puede tener hilos
+            # (carga anticipada de TensorFlow, micro-batcher, pools de hilos)
+            st["executor"] = ProcessPoolExecutor(max_workers=st["workers"], mp_context=get_context("forkserver"))
+        else:
+            st["executor"] = ThreadPoolExecutor(max_workers=st["workers"])
+    return st["executor"]
+
+
+def _retry_after(st: Dict[str, Any]) -> int:
+    # Tiempo estimado hasta que se libere una plaza: rondas de cola por duración media
+    avg = st["avg_seconds"] or 1.0
+    rounds = max(1, math.ceil((st["in_flight"] - st["workers"] + 1) / st["workers"]))
+    return max(1, math.ceil(avg * rounds))
+
+
+@asynccontextmanager
+async def admit(algorithm_key: str) -> AsyncIterator[None]:
+    """
+    Reserva una plaza del algoritmo durante el bloque o lanza SchedulerBusy.
+    Sólo se usa desde el event loop, así que los contadores no necesitan lock.
+    """
+    st = _get_state(algorithm_key)
+    if st["in_flight"] >= st["workers"] + st["queue"]:
+        st["rejected"] += 1
+        raise SchedulerBusy(algorithm_key, _retry_after(st))
+    st["in_flight"] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        st["in_flight"] -= 1
+        elapsed = time.perf_counter() - start
+        st["avg_seconds"] = elapsed if st["avg_seconds"] is None else (
+            DURATION_SMOOTHING * elapsed + (1 - DURATION_SMOOTHING) * st["avg_seconds"]
+        )
+
+
+def workers(algorithm_key: str) -> int:
+    """Número de ejecuciones simultáneas del pool del algoritmo."""
+    return _get_state(algorithm_key)["workers"]
+
+
+async def execute(algorithm_key: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Ejecuta `fn(*args)` en el pool del algoritmo, fuera del event loop, sin
+    pasar por la admisión: para quien ya ocupa una plaza con `admit`.
+    """
+    st = _get_state(algorithm_key)
+    if st["kind"] == "async":
+        return await fn(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor(st), partial(fn, *args))
+
+
+async def run(algorithm_key: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """Reserva una plaza del algoritmo y ejecuta `fn(*args)` en su pool."""
+    async with admit(algorithm_key):
+        return await execute(algorithm_key, fn, *args)
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Ocupación actual de cada algoritmo (para diagnóstico)."""
+    return {
+        key: {k: st[k] for k in ("kind", "workers", "queue", "in_flight", "avg_seconds", "rejected")}
+        for key, st in _state.items()
+    }
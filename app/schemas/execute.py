@@ -10,34 +10,53 @@ class EpochStats(BaseModel):
     best: float | None
     avg: float | None
 
+class HistoryColumns(BaseModel):
+    gen: List[int]
+    best: List[float | None]
+    avg: List[float | None]
+
 class FirstEpochOut(BaseModel):
     best: float | None
     avg: float | None
     population: List[Any]
+    population_size: Optional[int] = None
 
 class FinalOutGenetic(BaseModel):
     best_solution: List[Any]
     total_distance: float
+    stop: Optional[Dict[str, Any]] = None
+    cache_stats: Optional[Dict[str, int]] = None
 
 class FinalOutNB(BaseModel):
     metrics: Dict[str, Any]
     confusion: Optional[Dict[str, Any]] = None
     samples: Optional[List[Any]] = None
+    memory: Optional[Dict[str, int]] = None
+    model_id: Optional[str] = None
+    cv: Optional[Dict[str, Any]] = None
 
 class FinalOutNN(BaseModel):
     steps: List[Dict[str, Any]]
     final_weights: Dict[str, Any]
+    metrics: Optional[Dict[str, Any]] = None
+    runs: Optional[Dict[str, Any]] = None     # ejecuciones apiladas, en columnas por ejecución
 
 class FinalOutVision(BaseModel):
     type: Literal["vision"]
     prediction: str
     confidence: float
+    backend: Optional[str] = None             # "keras" | "tflite"
+    batch_size: Optional[int] = None          # imágenes en el forward compartido
+    queue_ms: Optional[float] = None          # espera en la cola del micro-batcher
+    preprocess_ms: Optional[float] = None     # decodificación y redimensionado
+    inference_ms: Optional[float] = None      # forward del lote
 
 class FinalOutNER(BaseModel):
     entities: List[Dict[str, str | float]]
 
 class ExecuteResult(BaseModel):
     history: List[EpochStats] = []
+    history_columns: Optional[HistoryColumns] = None
     first_epoch: Optional[FirstEpochOut] = None
     final: Union[
         FinalOutGenetic, 
@@ -46,3 +65,50 @@ class ExecuteResult(BaseModel):
         FinalOutVision,
         FinalOutNER
     ]
+
+class SweepRequest(BaseModel):
+    base: Dict[str, Any] = {}                 # parámetros comunes a todas las configuraciones
+    grid: Dict[str, List[Any]] = {}           # producto cartesiano de valores por parámetro
+    configs: List[Dict[str, Any]] = []        # o bien lista explícita de parámetros
+    verbosity: Literal["first", "all", "final"] = "final"
+    stream: bool = False                      # NDJSON, una línea por configuración terminada
+
+class SweepRow(BaseModel):
+    index: int
+    params: Dict[str, Any]
+    elapsed_ms: float
+    summary: Dict[str, Any] = {}
+    result: Optional[ExecuteResult] = None
+    error: Optional[str] = None
+
+class SweepResult(BaseModel):
+    algorithm_key: str
+    rows: List[SweepRow]
+
+class PredictNBRequest(BaseModel):
+    model_id: str
+    messages: List[str]
+    model: Literal["BernoulliNB", "MultinomialNB", "GaussianNB"] = "MultinomialNB"
+
+class PredictNBResult(BaseModel):
+    model_id: str
+    model: str
+    predictions: List[int]
+    labels: List[str]
+    spam_probability: List[float]
+    elapsed_ms: float
+
+class OnlineNBCreate(BaseModel):
+    name: str
+    params: Dict[str, Any] = {}                # test_size, random_state, lowercase, n_features
+
+class OnlineNBUpdate(BaseModel):
+    messages: List[str]
+    labels: List[Union[Literal["ham", "spam"], int]]
+
+class OnlineNBVersion(BaseModel):
+    model_id: str                             # utilizable en /predict/nb
+    params: Dict[str, Any]
+    models: List[str]
+    online: Dict[str, Any]                    # name, version, parent, n_samples, batch_size
+    metrics: Optional[Dict[str, Any]] = None  # None hasta que se piden
@@ -0,0 +1,69 @@
+import argparse
+import glob
+import os
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+# Convierte el clasificador de flores (Keras) a TFLite para servirlo en CPU
+# con VISION_BACKEND=tflite.
+#
+#   none:    float32, mismo modelo en formato TFLite
+#   dynamic: pesos en int8, activaciones en float (no necesita calibración)
+#   int8:    cuantización post-entrenamiento completa a int8, calibrada con
+#            imágenes de ejemplo (--calibration-dir)
+#
+# Ejemplo:
+#   python app/scripts/convert_vision_tflite.py --quantize int8 --calibration-dir data/flowers
+
+MODEL_PATH = "saved_models/flower_classifier_model.keras"
+OUTPUT_PATH = "saved_models/flower_classifier_model.tflite"
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png")
+
+
+def _calibration_images(directory: str, limit: int):
+    paths = sorted(
+        path
+        for pattern in IMAGE_PATTERNS
+        for path in glob.glob(os.path.join(directory, "**", pattern), recursive=True)
+    )
+    if not paths:
+        raise SystemExit(f"❌ No hay imágenes de calibración en {directory}")
+    rng = np.random.default_rng(0)
+    for path in rng.permutation(paths)[:limit]:
+        # Mismo preprocesado que app.algorithms.vision: RGB 224×224 escalado a [0, 1]
+        image = Image.open(path).convert("RGB").resize((224, 224))
+        yield np.asarray(image, dtype=np.float32)[None] / 255.0
+
+
+def convert(model_path: str, output_path: str, quantize: str, calibration_dir: str, samples: int) -> None:
+    model = tf.keras.models.load_model(model_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize in ("dynamic", "int8"):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == "int8":
+        if not calibration_dir:
+            raise SystemExit("❌ La cuantización int8 necesita --calibration-dir")
+        converter.representative_dataset = lambda: ([image] for image in _calibration_images(calibration_dir, samples))
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # Entrada y salida siguen en float32: el servicio no cambia su preprocesado
+
+    print(f"🔄 Convirtiendo {model_path} (quantize={quantize})...")
+    tflite_model = converter.convert()
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(tflite_model)
+    print(f"✅ {output_path}: {len(tflite_model) / 1e6:.1f} MB "
+          f"(original {os.path.getsize(model_path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convierte el modelo de visión a TFLite.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--quantize", choices=("none", "dynamic", "int8"), default="int8")
+    parser.add_argument("--calibration-dir", default=None, help="Imágenes de ejemplo para calibrar int8")
+    parser.add_argument("--samples", type=int, default=200, help="Máximo de imágenes de calibración")
+    args = parser.parse_args()
+    convert(args.model, args.output, args.quantize, args.calibration_dir, args.samples)
@@ -0,0 +1,50 @@
+import os
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+# Límite de tamaño de las subidas, aplicado sobre el cuerpo de la petición
+# antes de que Starlette parsee el formulario multipart (y lo vuelque a
+# disco): se rechaza con 413 por Content-Length si viene, y si no (o si
+# miente) en cuanto los bytes recibidos superan el límite.
+
+VISION_MAX_UPLOAD_BYTES = int(float(os.getenv("VISION_MAX_UPLOAD_MB", "10")) * 1024 * 1024)
+UPLOAD_LIMITS: Dict[str, int] = {
+    "/execute/vision": VISION_MAX_UPLOAD_BYTES,
+}
+
+
+def _detail(limit: int) -> str:
+    return f"La subida supera el tamaño máximo de {limit // (1024 * 1024)} MB."
+
+
+class UploadLimitMiddleware:
+    def __init__(self, app: Callable[..., Awaitable[None]], limits: Dict[str, int] = UPLOAD_LIMITS):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        limit = self.limits.get(scope["path"].rstrip("/")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await JSONResponse({"detail": _detail(limit)}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Dict[str, Any]:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Se propaga desde el parseo del formulario como un 413
+                    raise HTTPException(status_code=413, detail=_detail(limit))
+            return message
+
+        await self.app(scope, limited_receive, send)
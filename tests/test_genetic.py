@@ -0,0 +1,200 @@
+import numpy as np
+import pytest
+
+from app.algorithms import genetic
+
+
+# ---------------------------------------------------------------------------
+# Cruce OX vectorizado
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("length", [1, 2, 7, 30])
+def test_order_crossover_returns_permutations(length):
+    rng = np.random.default_rng(length)
+    parents1 = (rng.random((200, length)).argsort(axis=1) + 1).astype(np.int32)
+    parents2 = (rng.random((200, length)).argsort(axis=1) + 1).astype(np.int32)
+
+    children = genetic._np_order_crossover(rng, parents1, parents2)
+
+    assert children.shape == parents1.shape
+    assert children.dtype == parents1.dtype
+    expected = np.arange(1, length + 1)
+    for child in children:
+        np.testing.assert_array_equal(np.sort(child), expected)
+
+
+def test_order_crossover_matches_the_ox_definition():
+    length, n_children = 12, 300
+    rng = np.random.default_rng(0)
+    parents1 = (rng.random((n_children, length)).argsort(axis=1) + 1).astype(np.int32)
+    parents2 = (rng.random((n_children, length)).argsort(axis=1) + 1).astype(np.int32)
+
+    # Los cortes son lo primero que se sortea: se reproducen con la misma semilla
+    bounds = np.sort(np.random.default_rng(7).integers(0, length + 1, size=(n_children, 2)), axis=1)
+    children = genetic._np_order_crossover(np.random.default_rng(7), parents1, parents2)
+
+    for (a, b), p1, p2, child in zip(bounds, parents1, parents2, children):
+        segment = p1[a:b].tolist()
+        expected = [token for token in p2.tolist() if token not in segment]
+        expected[a:a] = segment
+        assert child.tolist() == expected
+
+
+def test_order_crossover_of_identical_parents_is_the_parent():
+    rng = np.random.default_rng(1)
+    parents = (rng.random((50, 9)).argsort(axis=1) + 1).astype(np.int32)
+
+    np.testing.assert_array_equal(genetic._np_order_crossover(rng, parents, parents.copy()), parents)
+
+
+def test_order_crossover_with_route_separators():
+    # Codificación con separadores: n clientes + (V - 1) separadores > n
+    rng = np.random.default_rng(2)
+    population = genetic._np_init_population(rng, 100, n=10, num_vehicles=4)
+    shuffled = population[rng.permutation(100)]
+
+    children = genetic._np_order_crossover(rng, population, shuffled)
+
+    expected = np.sort(population[0])
+    for child in children:
+        np.testing.assert_array_equal(np.sort(child), expected)
+
+
+# ---------------------------------------------------------------------------
+# Split del giant tour frente a fuerza bruta
+# ---------------------------------------------------------------------------
+
+def _random_instance(rng, n):
+    coords = rng.uniform(0, 50, size=(n + 1, 2))
+    coords[0] = 0.0  # depósito en el origen
+    dist = np.sqrt(((coords[:, None, :] - coords[None, :, :]) ** 2).sum(axis=2))
+    demand = np.concatenate([[0.0], rng.integers(1, 10, size=n).astype(float)])
+    return dist, demand
+
+
+def _brute_force_split(tour, dist, demand, capacity, num_vehicles):
+    # Todas las formas de cortar el tour en como mucho V rutas consecutivas
+    n = len(tour)
+    best = float("inf")
+    for mask in range(1 << (n - 1)):
+        cuts = [i for i in range(1, n) if mask >> (i - 1) & 1]
+        if len(cuts) + 1 > num_vehicles:
+            continue
+        bounds = [0] + cuts + [n]
+        cost = 0.0
+        for a, b in zip(bounds, bounds[1:]):
+            route = tour[a:b]
+            if demand[route].sum() > capacity:
+                break
+            path = [0] + route + [0]
+            cost += sum(dist[u, v] for u, v in zip(path, path[1:]))
+        else:
+            best = min(best, cost)
+    return best
+
+
+def _route_cost(routes, dist):
+    total = 0.0
+    for route in routes:
+        if route:
+            path = [0] + list(route) + [0]
+            total += sum(dist[u, v] for u, v in zip(path, path[1:]))
+    return total
+
+
+def test_split_matches_brute_force():
+    rng = np.random.default_rng(0)
+    checked_bounded = 0
+    for _ in range(300):
+        n = int(rng.integers(1, 9))
+        num_vehicles = int(rng.integers(1, 4))
+        dist, demand = _random_instance(rng, n)
+        capacity = float(rng.integers(int(demand.max()), int(demand.sum()) + 2))
+        tour = (rng.permutation(n) + 1).tolist()
+
+        expected = _brute_force_split(tour, dist, demand, capacity, num_vehicles)
+        population = np.asarray([tour], dtype=np.int32)
+        cum_dist, cum_load = genetic._gt_prefix_sums(population, dist, demand)
+        cost, routes = genetic._split(tour, cum_dist[0].tolist(), cum_load[0].tolist(), dist[0].tolist(),
+                                      capacity, num_vehicles, with_routes=True)
+        # Coste sólo con flota ilimitada: nan si hace falta la pasada por capas
+        unbounded, _ = genetic._split(tour, cum_dist[0].tolist(), cum_load[0].tolist(), dist[0].tolist(),
+                                      capacity, num_vehicles, layered=False)
+        checked_bounded += np.isnan(unbounded)
+
+        if np.isinf(expected):
+            assert np.isinf(cost)
+            assert routes is None
+            continue
+        assert cost == pytest.approx(expected)
+        # Las rutas devueltas recorren el tour en orden, caben y cuestan lo mismo
+        assert len(routes) == num_vehicles
+        assert [node for route in routes for node in route] == tour
+        assert all(demand[route].sum() <= capacity for route in routes)
+        assert _route_cost(routes, dist) == pytest.approx(expected)
+    # El caso de flota limitada (más rutas de las permitidas sin límite) sale
+    assert checked_bounded > 0
+
+
+def test_gt_fitness_matches_python_split_for_the_whole_population():
+    # _gt_fitness resuelve la pasada por capas en bloque (_split_bounded_np)
+    rng = np.random.default_rng(1)
+    for n, num_vehicles in [(6, 2), (15, 3), (25, 4)]:
+        dist, demand = _random_instance(rng, n)
+        capacity = float(demand.sum() / num_vehicles * 1.2)
+        population = (rng.random((200, n)).argsort(axis=1) + 1).astype(np.int32)
+
+        costs = genetic._gt_fitness(population, num_vehicles, dist, demand, capacity)
+
+        cum_dist, cum_load = genetic._gt_prefix_sums(population, dist, demand)
+        expected = [
+            genetic._split(tour, cd, cl, dist[0].tolist(), capacity, num_vehicles)[0]
+            for tour, cd, cl in zip(population.tolist(), cum_dist.tolist(), cum_load.tolist())
+        ]
+        np.testing.assert_allclose(costs, expected)
+        assert not np.isnan(costs).any()
+
+
+# ---------------------------------------------------------------------------
+# Historial submuestreado
+# ---------------------------------------------------------------------------
+
+def _history(n):
+    return [{"gen": g, "best": 100.0 - g % 7 - g / n, "avg": 120.0} for g in range(1, n + 1)]
+
+
+@pytest.mark.parametrize("n", [1, 2, 9, 100, 1001])
+@pytest.mark.parametrize("params", [
+    {},
+    {"history_every": 3},
+    {"history_every": 1000},
+    {"history_max_points": 1},
+    {"history_max_points": 2},
+    {"history_max_points": 10},
+    {"history_only_improved": True},
+    {"history_only_improved": True, "history_max_points": 3},
+])
+def test_downsample_history_keeps_last_generation_and_respects_max_points(n, params):
+    history = _history(n)
+
+    selected = genetic._downsample_history(history, params)
+
+    assert selected[-1] is history[-1]
+    assert [e["gen"] for e in selected] == sorted({e["gen"] for e in selected})
+    if params.get("history_max_points"):
+        assert len(selected) <= params["history_max_points"]
+
+
+def test_downsample_history_every_and_only_improved():
+    history = _history(20)
+
+    every = genetic._downsample_history(history, {"history_every": 5})
+    assert [e["gen"] for e in every] == [1, 6, 11, 16, 20]
+
+    improved = genetic._downsample_history(history, {"history_only_improved": True})
+    bests = [e["best"] for e in improved[:-1]]
+    assert bests == sorted(bests, reverse=True) and len(set(bests)) == len(bests)
+
+
+def test_downsample_history_empty():
+    assert genetic._downsample_history([], {"history_max_points": 5}) == []
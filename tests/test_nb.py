@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.naive_bayes import GaussianNB
+
+from app.algorithms import nb
+
+
+def _tfidf_like(rng, n_rows=300, n_features=80, density=0.05):
+    X = sp.random(n_rows, n_features, density=density, format="csr", random_state=rng,
+                  data_rvs=lambda size: rng.uniform(0.05, 1.0, size))
+    y = rng.integers(0, 2, size=n_rows)
+    y[:2] = [0, 1]  # las dos clases presentes
+    return X, y
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_gaussian_fit_sparse_matches_sklearn_dense_fit(seed):
+    rng = np.random.default_rng(seed)
+    X, y = _tfidf_like(rng)
+
+    sparse_model = nb._gaussian_fit_sparse(X, y)
+    dense_model = GaussianNB().fit(X.toarray(), y)
+
+    np.testing.assert_array_equal(sparse_model.classes_, dense_model.classes_)
+    np.testing.assert_allclose(sparse_model.class_prior_, dense_model.class_prior_)
+    np.testing.assert_allclose(sparse_model.theta_, dense_model.theta_, atol=1e-12)
+    np.testing.assert_allclose(sparse_model.var_, dense_model.var_, rtol=1e-9, atol=1e-12)
+    assert sparse_model.epsilon_ == pytest.approx(dense_model.epsilon_)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_gaussian_predict_sparse_matches_sklearn_predict(seed):
+    rng = np.random.default_rng(seed)
+    X, y = _tfidf_like(rng)
+    X_test, _ = _tfidf_like(rng, n_rows=200)
+    dense_model = GaussianNB().fit(X.toarray(), y)
+
+    np.testing.assert_array_equal(
+        nb._gaussian_predict_sparse(nb._gaussian_fit_sparse(X, y), X_test),
+        dense_model.predict(X_test.toarray()),
+    )
+    np.testing.assert_array_equal(
+        nb._gaussian_predict_sparse(dense_model, X_test),
+        dense_model.predict(X_test.toarray()),
+    )
+
+
+def test_gaussian_stats_by_chunks_equal_one_pass():
+    # El modo streaming acumula estadísticos por bloques
+    rng = np.random.default_rng(3)
+    X, y = _tfidf_like(rng)
+    classes = np.array([0, 1])
+
+    stats = None
+    for start in range(0, X.shape[0], 64):
+        stats = nb._gaussian_stats(X[start:start + 64], y[start:start + 64], classes, stats)
+    chunked = nb._gaussian_from_stats(stats, classes)
+    one_pass = nb._gaussian_fit_sparse(X, y)
+
+    np.testing.assert_allclose(chunked.theta_, one_pass.theta_)
+    np.testing.assert_allclose(chunked.var_, one_pass.var_)
+
+
+def test_gaussian_fit_chunked_matches_sklearn_dense_fit():
+    rng = np.random.default_rng(4)
+    X, y = _tfidf_like(rng)
+
+    chunked = nb._gaussian_fit_chunked(X, y, chunk_size=37)
+    dense_model = GaussianNB().fit(X.toarray(), y)
+
+    np.testing.assert_allclose(chunked.theta_, dense_model.theta_, atol=1e-12)
+    np.testing.assert_allclose(chunked.var_, dense_model.var_, rtol=1e-6, atol=1e-12)
+
+
+def test_gaussian_from_stats_requires_every_class():
+    rng = np.random.default_rng(5)
+    X, _ = _tfidf_like(rng, n_rows=10)
+
+    with pytest.raises(ValueError):
+        nb._gaussian_from_stats(nb._gaussian_stats(X, np.zeros(10), np.array([0, 1])), np.array([0, 1]))
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import scheduler
+
+
+def _limits(workers, queue, in_flight=0, avg_seconds=None):
+    return {
+        "kind": "thread",
+        "workers": workers,
+        "queue": queue,
+        "executor": None,
+        "in_flight": in_flight,
+        "avg_seconds": avg_seconds,
+        "rejected": 0,
+    }
+
+
+def test_admit_rejects_when_workers_and_queue_are_full(monkeypatch):
+    monkeypatch.setitem(scheduler._state, "test", _limits(workers=1, queue=1))
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def hold():
+            async with scheduler.admit("test"):
+                await release.wait()
+
+        holders = [asyncio.create_task(hold()) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert scheduler._state["test"]["in_flight"] == 2
+
+        with pytest.raises(scheduler.SchedulerBusy) as busy:
+            async with scheduler.admit("test"):
+                pass
+        assert busy.value.algorithm_key == "test"
+        assert busy.value.retry_after >= 1
+
+        release.set()
+        await asyncio.gather(*holders)
+        # Con plazas libres se vuelve a admitir
+        async with scheduler.admit("test"):
+            assert scheduler._state["test"]["in_flight"] == 1
+
+    asyncio.run(scenario())
+    assert scheduler._state["test"]["in_flight"] == 0
+    assert scheduler._state["test"]["rejected"] == 1
+
+
+@pytest.mark.parametrize("workers, in_flight, avg_seconds, expected", [
+    (1, 1, None, 1),      # sin historial: 1 s
+    (1, 1, 2.5, 3),       # una ronda de la duración media, redondeada hacia arriba
+    (2, 6, 4.0, 12),      # (6 - 2 + 1) / 2 -> 3 rondas
+])
+def test_retry_after_estimates_rounds_of_average_duration(workers, in_flight, avg_seconds, expected):
+    assert scheduler._retry_after(_limits(workers, 0, in_flight, avg_seconds)) == expected
+
+
+def test_run_executes_in_pool_and_records_duration(monkeypatch):
+    monkeypatch.setitem(scheduler._state, "test", _limits(workers=1, queue=0))
+
+    assert asyncio.run(scheduler.run("test", sum, [1, 2, 3])) == 6
+    assert scheduler._state["test"]["avg_seconds"] is not None
+    scheduler._state["test"]["executor"].shutdown()
+
+
+def test_busy_algorithm_answers_429_with_retry_after(monkeypatch):
+    # La ruta importa app.db: una base de datos en memoria basta (no se usa)
+    pytest.importorskip("aiosqlite")
+    monkeypatch.setenv("DATABASE_URL", os.getenv("DATABASE_URL", "sqlite+aiosqlite://"))
+    from app.routes import execute
+
+    app = FastAPI()
+    app.include_router(execute.router, prefix="/execute")
+    monkeypatch.setitem(scheduler._state, "nn", _limits(workers=1, queue=0, in_flight=1, avg_seconds=2.5))
+
+    response = TestClient(app).post("/execute/nn", data={"params_json": json.dumps({"params": {}})})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+    assert "nn" in response.json()["detail"]
+    assert scheduler._state["nn"]["rejected"] == 1
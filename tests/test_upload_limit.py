@@ -0,0 +1,60 @@
+from fastapi import FastAPI, File, Request, UploadFile
+from fastapi.testclient import TestClient
+
+from app.upload_limit import UploadLimitMiddleware
+
+LIMIT = 1024
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, limits={"/upload": LIMIT})
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    @app.post("/raw")
+    async def raw(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_small_upload_passes():
+    response = _client().post("/upload", files={"file": ("a.jpg", b"x" * 100, "image/jpeg")})
+
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+
+def test_rejects_by_content_length():
+    response = _client().post("/upload", files={"file": ("a.jpg", b"x" * (LIMIT + 1), "image/jpeg")})
+
+    assert response.status_code == 413
+    assert "MB" in response.json()["detail"]
+
+
+def test_rejects_chunked_body_without_content_length():
+    def chunks():
+        for _ in range(8):
+            yield b"x" * 512
+
+    response = _client().post("/upload", content=chunks(),
+                              headers={"Content-Type": "multipart/form-data; boundary=b"})
+
+    assert "content-length" not in response.request.headers
+    assert response.status_code == 413
+
+
+def test_trailing_slash_uses_the_same_limit():
+    response = _client().post("/upload/", files={"file": ("a.jpg", b"x" * (LIMIT + 1), "image/jpeg")})
+
+    assert response.status_code == 413
+
+
+def test_other_paths_are_not_limited():
+    response = _client().post("/raw", content=b"x" * (LIMIT * 4))
+
+    assert response.status_code == 200
+    assert response.json() == {"size": LIMIT * 4}